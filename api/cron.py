@@ -4,13 +4,15 @@
 Vercel Cron: проверка новых статей и рассылка подписчикам.
 Вызывается по расписанию (vercel.json → cron).
 Защита: задайте CRON_SECRET в env и передавайте в заголовке Authorization: Bearer <secret>.
+ASGI-приложение: event loop предоставляет рантайм Vercel.
 """
 
 import asyncio
+import hmac
 import logging
 import os
 import sys
-from http.server import BaseHTTPRequestHandler
+from typing import Optional
 
 from pathlib import Path
 
@@ -18,98 +20,241 @@ _root = Path(__file__).resolve().parent.parent
 if str(_root) not in sys.path:
     sys.path.insert(0, str(_root))
 
-from config import BOT_TOKEN
+import orjson
+from telegram import LinkPreviewOptions
+from telegram.error import Forbidden
+from telegram.ext import AIORateLimiter, ExtBot
+from telegram.request import HTTPXRequest
+
+from config import BOT_TOKEN, BROADCAST_CONCURRENCY
 from database import (
     init_database,
-    add_article,
-    article_exists,
+    add_articles,
+    add_notifications,
+    get_existing_urls,
     get_subscribed_users,
+    set_subscription,
 )
 from parser import get_latest_articles as fetch_latest
-from utils import escape_html, truncate_message
+from utils import escape_html, escape_url_attr
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# uvloop (если установлен) — для event loop, создаваемого рантаймом после импорта
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+
+_JSON = [(b"content-type", b"application/json")]
+
+# Тёплый контейнер Vercel переиспользует модуль: один бот с открытым пулом
+# соединений на все вызовы cron
+_bot: Optional[ExtBot] = None
+_bot_lock: Optional[asyncio.Lock] = None
+# Ограничение одновременных запросов в рассылке (сокеты, память под ожидающие запросы)
+_send_semaphore: Optional[asyncio.Semaphore] = None
+# Event loop, к которому привязаны объекты выше (см. _bind_to_running_loop)
+_bot_loop: Optional[asyncio.AbstractEventLoop] = None
+
+_NOTIFY_TEMPLATE = "📰 <b>Новая статья</b>\n\n<b>{title}</b>\n\n{summary}\n\n🔗 <a href=\"{url}\">Читать</a>"
+_NOTIFY_TEMPLATE_SHORT = "📰 <b>Новая статья</b>\n\n<b>{title}</b>\n\n🔗 <a href=\"{url}\">Читать</a>"
+# Рассылка без превью ссылки: Telegram не загружает страницу статьи на каждую отправку
+_NO_PREVIEW = LinkPreviewOptions(is_disabled=True)
+
+# Схема БД создаётся один раз на контейнер; известные URL кэширует get_existing_urls (LRU)
+_db_ready = False
+
+
+def _bind_to_running_loop() -> None:
+    """
+    Бот (его HTTP-пул), блокировка и семафор привязываются к event loop,
+    в котором использованы впервые. Если рантайм запустил вызов в новом loop,
+    они создаются заново; прежний бот отбрасывается без shutdown —
+    его соединения принадлежат другому loop, а lifespan shutdown может не прийти.
+    """
+    global _bot, _bot_lock, _send_semaphore, _bot_loop
+    loop = asyncio.get_running_loop()
+    if loop is _bot_loop:
+        return
+    if _bot is not None:
+        logger.info("Новый event loop — бот будет создан заново")
+    _bot = None
+    _bot_lock = asyncio.Lock()
+    _send_semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+    _bot_loop = loop
+
+
+async def _get_bot() -> ExtBot:
+    """Бот, инициализированный один раз на контейнер."""
+    global _bot
+    async with _bot_lock:
+        if _bot is None:
+            # Лимитер держит общий темп в пределах ограничений Telegram (30 сообщений/с)
+            # HTTP/2: все отправки мультиплексируются поверх одного соединения
+            bot = ExtBot(
+                token=BOT_TOKEN,
+                request=HTTPXRequest(connection_pool_size=100, http_version="2"),
+                rate_limiter=AIORateLimiter(overall_max_rate=30, overall_time_period=1, max_retries=3),
+            )
+            await bot.initialize()
+            _bot = bot
+    return _bot
+
+
+async def _shutdown_bot() -> None:
+    """Освобождение соединений при остановке контейнера."""
+    global _bot
+    if _bot is not None:
+        try:
+            await _bot.shutdown()
+        except Exception as e:
+            logger.warning("Ошибка shutdown бота: %s", e)
+        _bot = None
+
+
+def _format_notification(article: dict) -> str:
+    """Текст уведомления о новой статье (собирается один раз на статью)."""
+    title_safe = escape_html(article["title"])
+    url_safe = escape_url_attr(article["url"])
+    summary = article.get("summary")
+    if summary:
+        msg = _NOTIFY_TEMPLATE.format(title=title_safe, summary=escape_html(summary), url=url_safe)
+    else:
+        msg = _NOTIFY_TEMPLATE_SHORT.format(title=title_safe, url=url_safe)
+    if len(msg) > 4096:
+        msg = msg[:4090] + "..."
+    return msg
+
+
+async def _send_notification(bot: ExtBot, user_id: int, msg: str) -> bool:
+    """
+    Отправка уведомления одному подписчику.
+    RetryAfter (429) повторяет AIORateLimiter; заблокировавшие бота отписываются.
+    Возвращает False, если пользователь отписан.
+    """
+    try:
+        async with _send_semaphore:
+            await bot.send_message(
+                chat_id=user_id,
+                text=msg,
+                parse_mode="HTML",
+                link_preview_options=_NO_PREVIEW,
+                disable_notification=True,
+            )
+        return True
+    except Forbidden:
+        logger.info("Пользователь %s заблокировал бота — отписываем", user_id)
+        await asyncio.to_thread(set_subscription, user_id, False)
+        return False
+
 
 async def run_check_and_notify() -> dict:
     """Проверка новых статей и отправка подписчикам. Возвращает статистику."""
-    from telegram import Bot
+    global _db_ready
+    _bind_to_running_loop()
+    if not _db_ready:
+        await asyncio.to_thread(init_database)
+        _db_ready = True
+    # Загрузка с сайта (сеть) и выборка подписчиков (БД) независимы — выполняем параллельно
+    articles, users = await asyncio.gather(
+        asyncio.to_thread(fetch_latest, 10),
+        asyncio.to_thread(get_subscribed_users),
+    )
 
-    init_database()
-    articles = fetch_latest(10)
-    users = get_subscribed_users()
+    # Один запрос к БД на всю пачку вместо article_exists на каждую статью
+    candidates: dict = {}
+    for a in articles:
+        candidates.setdefault(a["url"], a)
+    existing = await asyncio.to_thread(get_existing_urls, list(candidates))
+    new_articles = [a for url, a in candidates.items() if url not in existing]
+    new_count = len(new_articles)
 
-    new_count = 0
-    sent_count = 0
+    subscribers = len(users)
+    sent: list = []
+    if users and new_articles:
+        sent = await _notify_subscribers(new_articles, users)
 
-    bot = Bot(token=BOT_TOKEN)
-    try:
-        for article in articles:
-            if article_exists(article["url"]):
-                continue
-            add_article(article["title"], article["url"], article.get("summary"))
-            new_count += 1
-
-            title_safe = escape_html(article["title"])
-            summary_safe = escape_html(article.get("summary", "")) if article.get("summary") else ""
-            url_safe = article["url"].replace('"', "&quot;")
-            msg = f"📰 <b>Новая статья</b>\n\n<b>{title_safe}</b>\n\n{summary_safe}\n\n🔗 <a href=\"{url_safe}\">Читать</a>"
-            if len(msg) > 4096:
-                msg = msg[:4090] + "..."
-
-            for user_id in users:
-                try:
-                    await bot.send_message(
-                        chat_id=user_id,
-                        text=msg,
-                        parse_mode="HTML",
-                    )
-                    sent_count += 1
-                    await asyncio.sleep(0.1)
-                except Exception as e:
-                    logger.warning("Не удалось отправить %s: %s", user_id, e)
-    finally:
-        await bot.shutdown()
-
-    return {"new_articles": new_count, "notifications_sent": sent_count, "subscribers": len(users)}
-
-
-class handler(BaseHTTPRequestHandler):
-    """Vercel Cron endpoint."""
-
-    def do_GET(self):
-        """Запуск проверки новых статей."""
-        # Проверка CRON_SECRET
-        secret = os.getenv("CRON_SECRET")
-        if secret:
-            auth = self.headers.get("Authorization", "")
-            if auth != f"Bearer {secret}":
-                self.send_response(403)
-                self.send_header("Content-type", "application/json")
-                self.end_headers()
-                self.wfile.write(b'{"error":"Forbidden"}')
-                return
-
-        if not BOT_TOKEN:
-            self.send_response(500)
-            self.send_header("Content-type", "application/json")
-            self.end_headers()
-            self.wfile.write(b'{"error":"BOT_TOKEN not set"}')
+    # Запись после рассылки (в потоке, не блокируя event loop): если рассылка упала,
+    # статьи не помечаются известными и будут разосланы при следующем запуске
+    await asyncio.to_thread(add_articles, new_articles)
+    await asyncio.to_thread(add_notifications, sent)
+
+    return {"new_articles": new_count, "notifications_sent": len(sent), "subscribers": subscribers}
+
+
+async def _notify_subscribers(new_articles: list, users: list) -> list:
+    """Рассылка новых статей подписчикам. Возвращает пары (user_id, url) отправленных."""
+    sent = []
+    bot = await _get_bot()
+    for article in new_articles:
+        msg = _format_notification(article)
+
+        results = await asyncio.gather(
+            *(_send_notification(bot, user_id, msg) for user_id in users),
+            return_exceptions=True,
+        )
+        active = []
+        for user_id, res in zip(users, results):
+            if isinstance(res, Exception):
+                logger.warning("Не удалось отправить %s: %s", user_id, res)
+                active.append(user_id)
+            elif res:
+                sent.append((user_id, article["url"]))
+                active.append(user_id)
+        # Заблокировавшим бота следующие статьи не отправляем
+        users = active
+
+    return sent
+
+
+async def _respond(send, status: int, body: bytes) -> None:
+    """Отправка JSON-ответа целиком, с Content-Length."""
+    headers = [*_JSON, (b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send) -> None:
+    """Обработка lifespan-событий ASGI (startup/shutdown контейнера)."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await _shutdown_bot()
+            await send({"type": "lifespan.shutdown.complete"})
             return
 
-        try:
-            result = asyncio.run(run_check_and_notify())
-            body = f'{{"ok":true,"new_articles":{result["new_articles"]},"notifications_sent":{result["notifications_sent"]},"subscribers":{result["subscribers"]}}}'
-        except Exception as e:
-            logger.exception("Ошибка cron: %s", e)
-            self.send_response(500)
-            self.send_header("Content-type", "application/json")
-            self.end_headers()
-            self.wfile.write(f'{{"error":"{str(e)}"}}'.encode())
+
+async def app(scope, receive, send) -> None:
+    """Vercel Cron endpoint (ASGI): запуск проверки новых статей."""
+    _bind_to_running_loop()
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+
+    # Проверка CRON_SECRET
+    secret = os.getenv("CRON_SECRET")
+    if secret:
+        headers = dict(scope.get("headers", []))
+        auth = headers.get(b"authorization") or b""
+        if not hmac.compare_digest(auth, f"Bearer {secret}".encode()):
+            await _respond(send, 403, b'{"error":"Forbidden"}')
             return
 
-        self.send_response(200)
-        self.send_header("Content-type", "application/json")
-        self.end_headers()
-        self.wfile.write(body.encode())
+    if not BOT_TOKEN:
+        await _respond(send, 500, b'{"error":"BOT_TOKEN not set"}')
+        return
+
+    try:
+        result = await run_check_and_notify()
+    except Exception as e:
+        logger.exception("Ошибка cron: %s", e)
+        await _respond(send, 500, orjson.dumps({"error": str(e)}))
+        return
+
+    await _respond(send, 200, orjson.dumps({"ok": True, **result}))
@@ -3,13 +3,13 @@
 """
 Vercel serverless function: webhook для Telegram бота.
 Получает POST от Telegram, обрабатывает update через python-telegram-bot.
+ASGI-приложение: event loop предоставляет рантайм Vercel.
 """
 
 import asyncio
-import json
 import logging
 import sys
-from http.server import BaseHTTPRequestHandler
+from typing import Optional
 
 # Добавляем корень проекта в path для импортов
 from pathlib import Path
@@ -18,56 +18,158 @@ _root = Path(__file__).resolve().parent.parent
 if str(_root) not in sys.path:
     sys.path.insert(0, str(_root))
 
+import orjson
 from telegram import Update
-from config import BOT_TOKEN
+from telegram.ext import Application
+from config import BOT_TOKEN, WEBHOOK_MAX_CONCURRENT_UPDATES, WEBHOOK_RESPONSE_TIMEOUT
 from bot import build_application
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# uvloop (если установлен) — для event loop, создаваемого рантаймом после импорта
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
 
-async def process_update(body: bytes) -> None:
-    """Обработка одного update от Telegram."""
-    data = json.loads(body)
-    application = build_application(BOT_TOKEN)
-    await application.initialize()
-    try:
-        update = Update.de_json(data, application.bot)
-        await application.process_update(update)
-    finally:
-        await application.shutdown()
+_TEXT_PLAIN = [(b"content-type", b"text/plain; charset=utf-8")]
 
+# Тёплый контейнер Vercel переиспользует модуль: держим один инициализированный
+# Application, чтобы не повторять initialize()/getMe на каждый update
+_app: Optional[Application] = None
+_app_lock: Optional[asyncio.Lock] = None
+# Ограничение параллельных update на общем Application в одном контейнере
+_updates_semaphore: Optional[asyncio.Semaphore] = None
+# Event loop, к которому привязаны объекты выше (см. _bind_to_running_loop)
+_app_loop: Optional[asyncio.AbstractEventLoop] = None
 
-class handler(BaseHTTPRequestHandler):
-    """Vercel Python handler для Telegram webhook."""
 
-    def do_GET(self):
-        """Проверка здоровья — для Vercel и отладки."""
-        self.send_response(200)
-        self.send_header("Content-type", "text/plain; charset=utf-8")
-        self.end_headers()
-        self.wfile.write(b"OK okolica bot webhook")
+def _bind_to_running_loop() -> None:
+    """
+    Application (его HTTP-пул), блокировка и семафор привязываются к event loop,
+    в котором использованы впервые. Если рантайм запустил вызов в новом loop,
+    они создаются заново; прежний Application отбрасывается без shutdown —
+    его соединения принадлежат другому loop, а lifespan shutdown может не прийти.
+    """
+    global _app, _app_lock, _updates_semaphore, _app_loop
+    loop = asyncio.get_running_loop()
+    if loop is _app_loop:
+        return
+    if _app is not None:
+        logger.info("Новый event loop — Application будет создан заново")
+    _app = None
+    _app_lock = asyncio.Lock()
+    _updates_semaphore = asyncio.Semaphore(WEBHOOK_MAX_CONCURRENT_UPDATES)
+    _app_loop = loop
 
-    def do_POST(self):
-        """Приём update от Telegram."""
-        content_length = int(self.headers.get("Content-Length", 0))
-        if content_length == 0:
-            self.send_error(400, "Empty body")
-            return
 
-        body = self.rfile.read(content_length)
+async def _get_application() -> Application:
+    """Application, инициализированный один раз на контейнер."""
+    global _app
+    async with _app_lock:
+        if _app is None:
+            application = build_application(BOT_TOKEN)
+            await application.initialize()
+            _app = application
+    return _app
+
 
+async def _shutdown_application() -> None:
+    """Освобождение соединений при остановке контейнера."""
+    global _app
+    if _app is not None:
         try:
-            asyncio.run(process_update(body))
+            await _app.shutdown()
         except Exception as e:
-            logger.exception("Ошибка обработки webhook: %s", e)
-            self.send_response(500)
-            self.send_header("Content-type", "text/plain; charset=utf-8")
-            self.end_headers()
-            self.wfile.write(str(e).encode("utf-8"))
+            logger.warning("Ошибка shutdown Application: %s", e)
+        _app = None
+
+
+async def process_update(data: dict) -> None:
+    """Обработка одного update от Telegram."""
+    application = await _get_application()
+    update = Update.de_json(data, application.bot)
+    async with _updates_semaphore:
+        await application.process_update(update)
+
+
+async def _read_body(receive) -> bytes:
+    """
+    Чтение тела запроса: один кусок возвращается как есть, без копирования.
+    Результат (bytes или bytearray) передаётся в orjson напрямую.
+    """
+    message = await receive()
+    body = message.get("body", b"")
+    if not message.get("more_body", False):
+        return body
+    buf = bytearray(body)
+    while message.get("more_body", False):
+        message = await receive()
+        buf += message.get("body", b"")
+    return buf
+
+
+async def _respond(send, status: int, body: bytes, headers: list = _TEXT_PLAIN) -> None:
+    """Отправка ответа целиком, с Content-Length."""
+    headers = [*headers, (b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send) -> None:
+    """Обработка lifespan-событий ASGI (startup/shutdown контейнера)."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await _shutdown_application()
+            await send({"type": "lifespan.shutdown.complete"})
             return
 
-        self.send_response(200)
-        self.send_header("Content-type", "text/plain; charset=utf-8")
-        self.end_headers()
-        self.wfile.write(b"OK")
+
+async def app(scope, receive, send) -> None:
+    """Vercel ASGI handler для Telegram webhook."""
+    _bind_to_running_loop()
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+
+    method = scope.get("method", "GET")
+    if method == "GET":
+        # Проверка здоровья — для Vercel и отладки
+        await _respond(send, 200, b"OK okolica bot webhook")
+        return
+    if method != "POST":
+        await _respond(send, 405, b"Method not allowed")
+        return
+
+    # Приём update от Telegram
+    body = await _read_body(receive)
+    if not body:
+        await _respond(send, 400, b"Empty body")
+        return
+
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        await _respond(send, 400, b"Invalid JSON")
+        return
+
+    # Vercel может заморозить контейнер сразу после ответа, поэтому 200 — только
+    # после обработки update. Не уложились в WEBHOOK_RESPONSE_TIMEOUT или ошибка —
+    # не 2xx: Telegram доставит update повторно, а не потеряет его
+    try:
+        await asyncio.wait_for(process_update(data), timeout=WEBHOOK_RESPONSE_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("Update не обработан за %s с — повтор доставки", WEBHOOK_RESPONSE_TIMEOUT)
+        await _respond(send, 503, b"Update processing timed out")
+        return
+    except Exception as e:
+        logger.error("Ошибка обработки webhook: %s", e, exc_info=e)
+        await _respond(send, 500, b"Update processing failed")
+        return
+
+    await _respond(send, 200, b"OK")
@@ -10,8 +10,11 @@ import datetime as _dt
 import apscheduler.util
 import pytz
 _orig_astimezone = apscheduler.util.astimezone
-def _patched_astimezone(obj):
-    if obj is None or obj is _dt.timezone.utc:
+# Результат для уже встречавшихся tz-объектов: ключ — сам объект (ссылка держит его,
+# поэтому id не переиспользуется)
+_tz_cache: dict = {}
+def _convert_astimezone(obj):
+    if obj is _dt.timezone.utc:
         return pytz.UTC
     if hasattr(obj, "zone") and obj.zone == "UTC":
         return pytz.UTC
@@ -20,18 +23,34 @@ def _patched_astimezone(obj):
         if getattr(obj, "utcoffset", lambda _: _dt.timedelta(0))(None) == _dt.timedelta(0):
             return pytz.UTC
     return _orig_astimezone(obj)
+def _patched_astimezone(obj):
+    if obj is None:
+        return pytz.UTC
+    if not isinstance(obj, _dt.tzinfo):
+        # Строки ("Europe/Moscow") и прочее — без кэша, как в оригинале
+        return _convert_astimezone(obj)
+    result = _tz_cache.get(obj)
+    if result is None:
+        result = _tz_cache[obj] = _convert_astimezone(obj)
+    return result
 apscheduler.util.astimezone = _patched_astimezone
 
 import asyncio
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
-from functools import partial
+from functools import partial, wraps
 from pathlib import Path
+from typing import Optional
 
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, LinkPreviewOptions
+from telegram.error import BadRequest, ChatMigrated, Forbidden
 import pytz
 from telegram.ext import (
+    AIORateLimiter,
     Application,
+    BaseUpdateProcessor,
     CommandHandler,
     MessageHandler,
     CallbackQueryHandler,
@@ -49,18 +68,26 @@ from config import (
     ARTICLES_LIMIT_SEARCH,
     ARTICLES_LIMIT_ARCHIVE,
     ARCHIVE_SEARCH_MAX_ATTEMPTS,
+    BROADCAST_CONCURRENCY,
+    POLLING_MAX_CONCURRENT_UPDATES,
+    DB_POOL_WORKERS,
+    IO_POOL_WORKERS,
     JOB_CHECK_INTERVAL_MINUTES,
+    LATEST_CACHE_TTL,
     MAX_MESSAGE_LENGTH,
 )
 from database import (
     init_database,
     add_user,
     set_subscription,
+    set_subscriptions,
     get_subscribed_users,
-    add_article,
-    article_exists,
+    add_articles,
+    add_notifications,
     search_articles,
     get_latest_articles,
+    get_setting,
+    set_setting,
 )
 from parser import (
     get_latest_articles as fetch_latest,
@@ -69,7 +96,7 @@ from parser import (
     search_okolica_archive,
     get_weather,
 )
-from utils import format_articles_list, truncate_message, escape_html
+from utils import format_articles_list, truncate_message, escape_html, escape_url_attr
 
 # Логирование
 logging.basicConfig(
@@ -79,45 +106,278 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def run_blocking(func, *args, **kwargs):
-    """Запуск блокирующей функции в пуле потоков."""
-    loop = asyncio.get_event_loop()
-    return loop.run_in_executor(None, partial(func, *args, **kwargs))
+def _run_in_executor(executor: ThreadPoolExecutor, func, *args, **kwargs):
+    """Запуск блокирующей функции в указанном пуле потоков."""
+    loop = asyncio.get_running_loop()
+    if kwargs:
+        return loop.run_in_executor(executor, partial(func, *args, **kwargs))
+    return loop.run_in_executor(executor, func, *args)
+
+
+# Раздельные пулы: долгие HTTP-запросы парсера не занимают потоки быстрых запросов к БД
+_db_executor = ThreadPoolExecutor(max_workers=DB_POOL_WORKERS, thread_name_prefix="db")
+_io_executor = ThreadPoolExecutor(max_workers=IO_POOL_WORKERS, thread_name_prefix="io")
+
+
+def run_db(func, *args, **kwargs):
+    """Запуск функции работы с БД в пуле потоков БД."""
+    return _run_in_executor(_db_executor, func, *args, **kwargs)
+
+
+def run_io(func, *args, **kwargs):
+    """Запуск сетевой функции (парсер, погода) в пуле потоков HTTP."""
+    return _run_in_executor(_io_executor, func, *args, **kwargs)
+
+
+def async_ttl_cache(ttl: float):
+    """
+    Кэш результатов корутины на ttl секунд по позиционным аргументам.
+    Одновременные вызовы с одинаковыми аргументами ждут один общий запрос.
+    Исключения и пустые результаты не кэшируются.
+    """
+    def decorator(func):
+        cache: dict = {}
+
+        def evict(args: tuple, task: asyncio.Future) -> None:
+            # Удаляем только свою запись: её могла заменить более новая загрузка
+            if cache.get(args, (None, None))[1] is task:
+                del cache[args]
+
+        @wraps(func)
+        async def wrapper(*args):
+            now = time.monotonic()
+            entry = cache.get(args)
+            if entry is not None and entry[0] > now:
+                return await asyncio.shield(entry[1])
+            task = asyncio.ensure_future(func(*args))
+            cache[args] = (now + ttl, task)
+            try:
+                result = await asyncio.shield(task)
+            except Exception:
+                evict(args, task)
+                raise
+            if not result:
+                evict(args, task)
+            return result
+
+        return wrapper
+    return decorator
+
+
+@async_ttl_cache(LATEST_CACHE_TTL)
+async def cached_fetch_latest(limit: int) -> list[dict]:
+    """Последние статьи с сайта (кэш LATEST_CACHE_TTL)."""
+    return await run_io(fetch_latest, limit)
+
+
+# Часовой пояс планировщика и ключи конфигурации JobQueue, которые задаём сами
+_TZ = pytz.timezone("Europe/Moscow")
+_SCHED_CFG_KEYS_TO_DROP = frozenset({"timezone"})
+
+# Рассылка без превью ссылки (в ответах на /latest превью остаётся)
+_NO_PREVIEW = LinkPreviewOptions(is_disabled=True)
+
+# Ключ настройки с file_id фото приветствия
+_WELCOME_FILE_ID_KEY = "welcome_file_id"
+
+# Статические тексты и клавиатура — создаются один раз при импорте
+_START_TEXT = """👋 Добро пожаловать, {name}!
+
+Я бот газеты «Сибирская околица». Вот что я умею:
+
+📰 /latest — последние новости
+🔍 /search <запрос> — поиск (новый + старый сайт)
+📰 /search_old_news <запрос> — поиск новостей на okolica.net
+📖 /search_old_archive <запрос> — поиск поэзии и статей в архиве
+📚 Архив — выпуски газеты (okolica.net/gazeta/)
+🌤️ /weather — погода в Татарске
+📝 /news <текст> — предложить новость
+📣 /voice <текст> — написать в рубрику «Голос народа»
+📞 /contacts — контакты редакции
+📢 /subscribe — подписаться на уведомления
+🔕 /unsubscribe — отписаться
+
+Используйте /help для подробной справки."""
+
+_HELP_TEXT = """🤖 <b>Справка по командам</b>
+
+📰 /latest — последние статьи
+🔍 /search &lt;текст&gt; — поиск (okolica.net и sibokolica.ru)
+📰 /search_old_news &lt;текст&gt; — поиск новостей на okolica.net
+📖 /search_old_archive &lt;текст&gt; — поиск поэзии и статей в архиве
+📚 Архив — выпуски газеты (okolica.net/gazeta/)
+🌤️ /weather — погода
+📝 /news &lt;текст&gt; — предложить новость
+📣 /voice &lt;текст&gt; — написать в рубрику «Голос народа»
+📞 /contacts — контакты редакции
+📢 /subscribe — подписка на уведомления
+🔕 /unsubscribe — отписка
+
+🌐 <b>Сайт:</b> https://sibokolica.ru"""
+
+_CONTACTS_TEXT = """📞 <b>Контакты редакции</b>
+
+Редакция находится по адресу:
+г. Татарск, ул. Ленина, 63а
+
+Телефон: 2-444-6
+
+По любым вопросам: 8-993-011-5384
+(писать в мессенджер MAX)"""
+
+_SEARCH_OLD_NEWS_PROMPT = (
+    "📰 <b>Поиск новостей на okolica.net</b>\n\n"
+    "Укажите запрос: /search_old_news ваш запрос"
+)
+
+_SEARCH_OLD_ARCHIVE_PROMPT = (
+    "📖 <b>Поиск по архиву</b> (Район, Бизнес, Авторское)\n\n"
+    "Укажите запрос: /search_old_archive ваш запрос"
+)
+
+_NEWS_PROMPT = (
+    "📝 <b>Предложить новость</b>\n\n"
+    "Напишите: /news ваш текст новости\n\n"
+    "Ваше сообщение будет отправлено в редакцию."
+)
+
+_VOICE_PROMPT = (
+    "📣 <b>Голос народа</b>\n\n"
+    "Напишите в нашу рубрику «Голос народа»:\n"
+    "/voice ваш текст обращения\n\n"
+    "Ваше сообщение будет отправлено в редакцию."
+)
+
+_MAIN_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📰 Последние новости", callback_data="latest")],
+    [InlineKeyboardButton("🔍 Поиск", callback_data="search_prompt")],
+    [InlineKeyboardButton("📰 Поиск новостей (старый сайт)", callback_data="search_old_news_prompt")],
+    [InlineKeyboardButton("📖 Поиск иной инфы (архив)", callback_data="search_old_archive_prompt")],
+    [InlineKeyboardButton("📚 Архив", url=f"{OLD_SITE_URL}/gazeta/")],
+    [InlineKeyboardButton("📝 Предложить новость", callback_data="news_prompt")],
+    [InlineKeyboardButton("📣 В Голос народа", callback_data="voice_prompt")],
+    [InlineKeyboardButton("📞 Контакты", callback_data="contacts")],
+    [InlineKeyboardButton("🌤️ Погода", callback_data="weather")],
+    [InlineKeyboardButton("🌐 Сайт газеты", url=SITE_URL)],
+])
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Параллельная обработка update разных чатов: долгий /search одного
+    пользователя не задерживает /weather другого. Внутри чата порядок сохраняется.
+    Update, ждущий свою очередь в чате, не занимает общий слот: сначала берётся
+    блокировка чата, затем собственный семафор на max_updates. Семафор базового
+    класса задан с запасом (_BASE_MAX_UPDATES) и фактически не ограничивает.
+    """
+
+    __slots__ = ("_chat_locks", "_running")
+
+    _BASE_MAX_UPDATES = 4096
+
+    def __init__(self, max_updates: int):
+        super().__init__(self._BASE_MAX_UPDATES)
+        # chat_id -> [lock, число ожидающих/выполняемых update]
+        self._chat_locks: dict[int, list] = {}
+        self._running = asyncio.Semaphore(max_updates)
+
+    async def do_process_update(self, update: object, coroutine) -> None:
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            async with self._running:
+                await coroutine
+            return
+        entry = self._chat_locks.get(chat.id)
+        if entry is None:
+            entry = self._chat_locks[chat.id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                async with self._running:
+                    await coroutine
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._chat_locks[chat.id]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
 
 
 class OkolicaBot:
     """Основной класс бота."""
 
+    # Команды и их обработчики; частые (latest, search, weather) — первыми,
+    # т.к. PTB перебирает обработчики группы по порядку
+    _COMMANDS = (
+        ("latest", "cmd_latest"),
+        ("search", "cmd_search"),
+        ("weather", "cmd_weather"),
+        ("start", "cmd_start"),
+        ("help", "cmd_help"),
+        ("subscribe", "cmd_subscribe"),
+        ("unsubscribe", "cmd_unsubscribe"),
+        ("news", "cmd_news"),
+        ("voice", "cmd_voice"),
+        ("contacts", "cmd_contacts"),
+        ("search_old", "cmd_search_old"),
+        ("search_old_news", "cmd_search_old_news"),
+        ("search_old_archive", "cmd_search_old_archive"),
+    )
+
     def __init__(self, token: str):
         self.token = token
         init_database()
-        tz = pytz.timezone("Europe/Moscow")
+        self._send_semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+        # Фото приветствия читается один раз, а не на каждый /start
+        photo_path = Path(__file__).parent / "okolica.jpg"
+        self._welcome_photo: Optional[bytes] = (
+            photo_path.read_bytes() if photo_path.exists() else None
+        )
+        # После первой загрузки Telegram возвращает file_id — дальше отправляем только его
+        self._welcome_file_id: Optional[str] = (
+            get_setting(_WELCOME_FILE_ID_KEY) if self._welcome_photo else None
+        )
+        # Кэш подписчиков: при polling загружается при старте (_load_subscribers),
+        # в webhook — при первой рассылке; далее обновляется при записи в БД
+        self._subscribers: Optional[set[int]] = None
         job_queue = JobQueue()
-        cfg = {k: v for k, v in job_queue.scheduler_configuration.items() if k != "timezone"}
-        job_queue.scheduler.configure(timezone=tz, **cfg)
+        cfg = {
+            k: v for k, v in job_queue.scheduler_configuration.items()
+            if k not in _SCHED_CFG_KEYS_TO_DROP
+        }
+        job_queue.scheduler.configure(timezone=_TZ, **cfg)
+        # Общий лимит Telegram (30 сообщений/с) и повтор при RetryAfter вместо фиксированных пауз
         self.application = (
             Application.builder()
             .token(token)
             .job_queue(job_queue)
+            .rate_limiter(AIORateLimiter(overall_max_rate=30, overall_time_period=1, max_retries=3))
+            .concurrent_updates(ChatOrderedUpdateProcessor(POLLING_MAX_CONCURRENT_UPDATES))
             .build()
         )
         self._setup_handlers()
 
+    def _update_subscriber_cache(self, user_id: int, subscribed: bool) -> None:
+        """Синхронизация кэша подписчиков с записью в БД."""
+        if self._subscribers is None:
+            return
+        if subscribed:
+            self._subscribers.add(user_id)
+        else:
+            self._subscribers.discard(user_id)
+
+    async def _load_subscribers(self, application: Application) -> None:
+        """post_init для polling: кэш подписчиков до первого update."""
+        self._subscribers = set(await run_db(get_subscribed_users))
+
     def _setup_handlers(self) -> None:
         """Регистрация обработчиков команд и сообщений."""
-        self.application.add_handler(CommandHandler("start", self.cmd_start))
-        self.application.add_handler(CommandHandler("help", self.cmd_help))
-        self.application.add_handler(CommandHandler("latest", self.cmd_latest))
-        self.application.add_handler(CommandHandler("weather", self.cmd_weather))
-        self.application.add_handler(CommandHandler("search", self.cmd_search))
-        self.application.add_handler(CommandHandler("subscribe", self.cmd_subscribe))
-        self.application.add_handler(CommandHandler("unsubscribe", self.cmd_unsubscribe))
-        self.application.add_handler(CommandHandler("news", self.cmd_news))
-        self.application.add_handler(CommandHandler("voice", self.cmd_voice))
-        self.application.add_handler(CommandHandler("contacts", self.cmd_contacts))
-        self.application.add_handler(CommandHandler("search_old", self.cmd_search_old))
-        self.application.add_handler(CommandHandler("search_old_news", self.cmd_search_old_news))
-        self.application.add_handler(CommandHandler("search_old_archive", self.cmd_search_old_archive))
+        for name, attr in self._COMMANDS:
+            self.application.add_handler(CommandHandler(name, getattr(self, attr)))
         self.application.add_handler(
             MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message)
         )
@@ -130,93 +390,63 @@ class OkolicaBot:
     async def cmd_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Приветствие и регистрация пользователя."""
         user = update.effective_user
-        await run_blocking(
+        subscribed = await run_db(
             add_user,
             user.id,
             user.username,
             user.first_name,
             user.last_name,
         )
+        self._update_subscriber_cache(user.id, subscribed)
 
         name = user.first_name or "друг"
-        text = f"""👋 Добро пожаловать, {name}!
-
-Я бот газеты «Сибирская околица». Вот что я умею:
-
-📰 /latest — последние новости
-🔍 /search <запрос> — поиск (новый + старый сайт)
-📰 /search_old_news <запрос> — поиск новостей на okolica.net
-📖 /search_old_archive <запрос> — поиск поэзии и статей в архиве
-📚 Архив — выпуски газеты (okolica.net/gazeta/)
-🌤️ /weather — погода в Татарске
-📝 /news <текст> — предложить новость
-📣 /voice <текст> — написать в рубрику «Голос народа»
-📞 /contacts — контакты редакции
-📢 /subscribe — подписаться на уведомления
-🔕 /unsubscribe — отписаться
-
-Используйте /help для подробной справки."""
-
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("📰 Последние новости", callback_data="latest")],
-            [InlineKeyboardButton("🔍 Поиск", callback_data="search_prompt")],
-            [InlineKeyboardButton("📰 Поиск новостей (старый сайт)", callback_data="search_old_news_prompt")],
-            [InlineKeyboardButton("📖 Поиск иной инфы (архив)", callback_data="search_old_archive_prompt")],
-            [InlineKeyboardButton("📚 Архив", url=f"{OLD_SITE_URL}/gazeta/")],
-            [InlineKeyboardButton("📝 Предложить новость", callback_data="news_prompt")],
-            [InlineKeyboardButton("📣 В Голос народа", callback_data="voice_prompt")],
-            [InlineKeyboardButton("📞 Контакты", callback_data="contacts")],
-            [InlineKeyboardButton("🌤️ Погода", callback_data="weather")],
-            [InlineKeyboardButton("🌐 Сайт газеты", url=SITE_URL)],
-        ])
-
-        photo_path = Path(__file__).parent / "okolica.jpg"
-        if photo_path.exists():
-            await update.message.reply_photo(
-                photo=photo_path,
+        text = _START_TEXT.format(name=name)
+
+        if self._welcome_file_id:
+            try:
+                await update.message.reply_photo(
+                    photo=self._welcome_file_id,
+                    caption=text,
+                    reply_markup=_MAIN_KEYBOARD,
+                )
+                return
+            except BadRequest as e:
+                # file_id недействителен (например, сменился токен) — загружаем файл заново
+                logger.warning("file_id фото приветствия не принят: %s", e)
+                self._welcome_file_id = None
+
+        if self._welcome_photo:
+            msg = await update.message.reply_photo(
+                photo=self._welcome_photo,
                 caption=text,
-                reply_markup=keyboard,
+                reply_markup=_MAIN_KEYBOARD,
             )
+            if msg.photo:
+                self._welcome_file_id = msg.photo[-1].file_id
+                await run_db(set_setting, _WELCOME_FILE_ID_KEY, self._welcome_file_id)
         else:
-            await update.message.reply_text(text, reply_markup=keyboard)
+            await update.message.reply_text(text, reply_markup=_MAIN_KEYBOARD)
 
     async def cmd_help(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Справка по командам."""
-        text = """🤖 <b>Справка по командам</b>
-
-📰 /latest — последние статьи
-🔍 /search &lt;текст&gt; — поиск (okolica.net и sibokolica.ru)
-📰 /search_old_news &lt;текст&gt; — поиск новостей на okolica.net
-📖 /search_old_archive &lt;текст&gt; — поиск поэзии и статей в архиве
-📚 Архив — выпуски газеты (okolica.net/gazeta/)
-🌤️ /weather — погода
-📝 /news &lt;текст&gt; — предложить новость
-📣 /voice &lt;текст&gt; — написать в рубрику «Голос народа»
-📞 /contacts — контакты редакции
-📢 /subscribe — подписка на уведомления
-🔕 /unsubscribe — отписка
-
-🌐 <b>Сайт:</b> https://sibokolica.ru"""
-
-        await update.message.reply_text(text, parse_mode="HTML")
+        await update.message.reply_text(_HELP_TEXT, parse_mode="HTML")
 
     async def cmd_latest(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Последние новости."""
-        chat_id = update.effective_chat.id
-        await context.bot.send_message(chat_id, "🔄 Загружаю последние новости…")
-
-        # Сначала получаем свежие данные с сайта
-        articles = await run_blocking(fetch_latest, ARTICLES_LIMIT_LATEST)
+        await self._send_latest(update.effective_chat.id, context)
 
-        if not articles:
-            articles = await run_blocking(get_latest_articles, ARTICLES_LIMIT_LATEST)
+    async def _send_latest(self, chat_id: int, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Загрузка и отправка последних новостей (команда /latest и кнопка)."""
+        await context.bot.send_message(chat_id, "🔄 Загружаю последние новости…")
 
+        # Сначала получаем свежие данные с сайта и сохраняем новые статьи в БД
+        articles = await cached_fetch_latest(ARTICLES_LIMIT_LATEST)
         if articles:
-            # Сохраняем новые статьи в БД
-            for a in articles:
-                if not await run_blocking(article_exists, a["url"]):
-                    await run_blocking(add_article, a["title"], a["url"], a.get("summary"))
+            await self._store_new_articles(articles)
+        else:
+            articles = await run_db(get_latest_articles, ARTICLES_LIMIT_LATEST)
 
+        if articles:
             text = format_articles_list(
                 articles,
                 "📰 <b>Последние новости:</b>\n",
@@ -234,7 +464,7 @@ class OkolicaBot:
 
     async def cmd_weather(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Погода."""
-        weather = await run_blocking(get_weather)
+        weather = await run_io(get_weather)
         await update.message.reply_text(weather)
 
     async def cmd_search(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -249,9 +479,9 @@ class OkolicaBot:
         chat_id = update.effective_chat.id
         await context.bot.send_message(chat_id, "🔍 Ищу…")
 
-        articles = await run_blocking(search_okolica_old, query, ARTICLES_LIMIT_SEARCH)
+        articles = await run_io(search_okolica_old, query, ARTICLES_LIMIT_SEARCH)
         if not articles:
-            articles = await run_blocking(search_articles, query, ARTICLES_LIMIT_SEARCH)
+            articles = await run_db(search_articles, query, ARTICLES_LIMIT_SEARCH)
 
         if articles:
             header = f"🔍 <b>Результаты по запросу «{escape_html(query)}»:</b>\n\n"
@@ -283,9 +513,9 @@ class OkolicaBot:
         chat_id = update.effective_chat.id
         await context.bot.send_message(chat_id, "🔎 Ищу на okolica.net…")
 
-        articles = await run_blocking(search_okolica_news, query, ARTICLES_LIMIT_SEARCH)
+        articles = await run_io(search_okolica_news, query, ARTICLES_LIMIT_SEARCH)
         if not articles:
-            articles = await run_blocking(search_okolica_archive, query, ARTICLES_LIMIT_ARCHIVE)
+            articles = await run_io(search_okolica_archive, query, ARTICLES_LIMIT_ARCHIVE)
 
         if articles:
             header = f"🔎 <b>Результаты на okolica.net по запросу «{escape_html(query)}»:</b>\n\n"
@@ -300,18 +530,14 @@ class OkolicaBot:
     async def cmd_search_old_news(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Поиск новостей на okolica.net."""
         if not context.args:
-            await update.message.reply_text(
-                "📰 <b>Поиск новостей на okolica.net</b>\n\n"
-                "Укажите запрос: /search_old_news ваш запрос",
-                parse_mode="HTML",
-            )
+            await update.message.reply_text(_SEARCH_OLD_NEWS_PROMPT, parse_mode="HTML")
             return
 
         query = " ".join(context.args)
         chat_id = update.effective_chat.id
         await context.bot.send_message(chat_id, "📰 Ищу новости на okolica.net…")
 
-        articles = await run_blocking(search_okolica_news, query, ARTICLES_LIMIT_SEARCH)
+        articles = await run_io(search_okolica_news, query, ARTICLES_LIMIT_SEARCH)
 
         if articles:
             header = f"📰 <b>Новости okolica.net по запросу «{escape_html(query)}»:</b>\n\n"
@@ -326,11 +552,7 @@ class OkolicaBot:
     async def cmd_search_old_archive(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Поиск поэзии и статей в архиве газеты."""
         if not context.args:
-            await update.message.reply_text(
-                "📖 <b>Поиск по архиву</b> (Район, Бизнес, Авторское)\n\n"
-                "Укажите запрос: /search_old_archive ваш запрос",
-                parse_mode="HTML",
-            )
+            await update.message.reply_text(_SEARCH_OLD_ARCHIVE_PROMPT, parse_mode="HTML")
             return
 
         query = " ".join(context.args)
@@ -341,7 +563,7 @@ class OkolicaBot:
             f"📖 Ищу в архиве okolica.net… (максимум {ARCHIVE_SEARCH_MAX_ATTEMPTS} попыток)",
         )
 
-        articles = await run_blocking(search_okolica_archive, query, ARTICLES_LIMIT_ARCHIVE)
+        articles = await run_io(search_okolica_archive, query, ARTICLES_LIMIT_ARCHIVE)
 
         if articles:
             header = f"📖 <b>Архив газеты по запросу «{escape_html(query)}»:</b>\n\n"
@@ -356,7 +578,8 @@ class OkolicaBot:
     async def cmd_subscribe(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Подписка на уведомления."""
         user_id = update.effective_user.id
-        await run_blocking(set_subscription, user_id, True)
+        if await run_db(set_subscription, user_id, True):
+            self._update_subscriber_cache(user_id, True)
         await update.message.reply_text(
             "✅ Вы подписаны на уведомления о новых статьях!\n"
             "Используйте /unsubscribe для отписки."
@@ -365,7 +588,8 @@ class OkolicaBot:
     async def cmd_unsubscribe(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Отписка от уведомлений."""
         user_id = update.effective_user.id
-        await run_blocking(set_subscription, user_id, False)
+        await run_db(set_subscription, user_id, False)
+        self._update_subscriber_cache(user_id, False)
         await update.message.reply_text(
             "🔕 Вы отписаны от уведомлений.\n"
             "Используйте /subscribe для подписки."
@@ -400,12 +624,7 @@ class OkolicaBot:
     async def cmd_news(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Предложить новость — пересылается администратору."""
         if not context.args:
-            await update.message.reply_text(
-                "📝 <b>Предложить новость</b>\n\n"
-                "Напишите: /news ваш текст новости\n\n"
-                "Ваше сообщение будет отправлено в редакцию.",
-                parse_mode="HTML",
-            )
+            await update.message.reply_text(_NEWS_PROMPT, parse_mode="HTML")
             return
         text = " ".join(context.args)
         user = update.effective_user
@@ -424,13 +643,7 @@ class OkolicaBot:
     async def cmd_voice(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Написать в рубрику «Голос народа» — пересылается администратору."""
         if not context.args:
-            await update.message.reply_text(
-                "📣 <b>Голос народа</b>\n\n"
-                "Напишите в нашу рубрику «Голос народа»:\n"
-                "/voice ваш текст обращения\n\n"
-                "Ваше сообщение будет отправлено в редакцию.",
-                parse_mode="HTML",
-            )
+            await update.message.reply_text(_VOICE_PROMPT, parse_mode="HTML")
             return
         text = " ".join(context.args)
         user = update.effective_user
@@ -448,16 +661,7 @@ class OkolicaBot:
 
     async def cmd_contacts(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Контакты редакции."""
-        text = """📞 <b>Контакты редакции</b>
-
-Редакция находится по адресу:
-г. Татарск, ул. Ленина, 63а
-
-Телефон: 2-444-6
-
-По любым вопросам: 8-993-011-5384
-(писать в мессенджер MAX)"""
-        await update.message.reply_text(text, parse_mode="HTML")
+        await update.message.reply_text(_CONTACTS_TEXT, parse_mode="HTML")
 
     async def handle_message(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -479,24 +683,10 @@ class OkolicaBot:
         chat_id = query.message.chat_id
 
         if query.data == "latest":
-            # Эмулируем вызов latest — создаём фейковый update с chat
-            await context.bot.send_message(chat_id, "🔄 Загружаю последние новости…")
-            articles = await run_blocking(fetch_latest, ARTICLES_LIMIT_LATEST)
-            if not articles:
-                articles = await run_blocking(get_latest_articles, ARTICLES_LIMIT_LATEST)
-            if articles:
-                for a in articles:
-                    if not await run_blocking(article_exists, a["url"]):
-                        await run_blocking(add_article, a["title"], a["url"], a.get("summary"))
-                text = format_articles_list(articles, "📰 <b>Последние новости:</b>\n")
-                await context.bot.send_message(
-                    chat_id, truncate_message(text), parse_mode="HTML"
-                )
-            else:
-                await context.bot.send_message(chat_id, "😔 Не удалось загрузить новости.")
+            await self._send_latest(chat_id, context)
 
         elif query.data == "weather":
-            weather = await run_blocking(get_weather)
+            weather = await run_io(get_weather)
             await context.bot.send_message(chat_id, weather)
 
         elif query.data == "search_prompt":
@@ -506,50 +696,19 @@ class OkolicaBot:
             )
 
         elif query.data == "search_old_news_prompt":
-            await context.bot.send_message(
-                chat_id,
-                "📰 <b>Поиск новостей на okolica.net</b>\n\n"
-                "Укажите запрос: /search_old_news ваш запрос",
-                parse_mode="HTML",
-            )
+            await context.bot.send_message(chat_id, _SEARCH_OLD_NEWS_PROMPT, parse_mode="HTML")
 
         elif query.data == "search_old_archive_prompt":
-            await context.bot.send_message(
-                chat_id,
-                "📖 <b>Поиск по архиву</b> (Район, Бизнес, Авторское)\n\n"
-                "Укажите запрос: /search_old_archive ваш запрос",
-                parse_mode="HTML",
-            )
+            await context.bot.send_message(chat_id, _SEARCH_OLD_ARCHIVE_PROMPT, parse_mode="HTML")
 
         elif query.data == "news_prompt":
-            await context.bot.send_message(
-                chat_id,
-                "📝 <b>Предложить новость</b>\n\n"
-                "Напишите: /news ваш текст новости\n\n"
-                "Ваше сообщение будет отправлено в редакцию.",
-                parse_mode="HTML",
-            )
+            await context.bot.send_message(chat_id, _NEWS_PROMPT, parse_mode="HTML")
 
         elif query.data == "voice_prompt":
-            await context.bot.send_message(
-                chat_id,
-                "📣 <b>Голос народа</b>\n\n"
-                "Напишите в нашу рубрику «Голос народа»:\n"
-                "/voice ваш текст обращения\n\n"
-                "Ваше сообщение будет отправлено в редакцию.",
-                parse_mode="HTML",
-            )
+            await context.bot.send_message(chat_id, _VOICE_PROMPT, parse_mode="HTML")
 
         elif query.data == "contacts":
-            text = (
-                "📞 <b>Контакты редакции</b>\n\n"
-                "Редакция находится по адресу:\n"
-                "г. Татарск, ул. Ленина, 63а\n\n"
-                "Телефон: 2-444-6\n\n"
-                "По любым вопросам: 8-993-011-5384\n"
-                "(писать в мессенджер MAX)"
-            )
-            await context.bot.send_message(chat_id, text, parse_mode="HTML")
+            await context.bot.send_message(chat_id, _CONTACTS_TEXT, parse_mode="HTML")
 
     async def cmd_unknown(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -569,44 +728,87 @@ class OkolicaBot:
                 "⚠️ Произошла ошибка. Попробуйте позже или /help"
             )
 
+    async def _store_new_articles(self, articles: list[dict]) -> list[dict]:
+        """
+        Сохранение в БД статей, которых там ещё нет: одна пакетная вставка
+        INSERT OR IGNORE без отдельной проверки. Возвращает новые статьи (без дублей по URL).
+        """
+        by_url: dict[str, dict] = {}
+        for a in articles:
+            by_url.setdefault(a["url"], a)
+        return await run_db(add_articles, list(by_url.values()))
+
+    async def _send_notification(
+        self, context: ContextTypes.DEFAULT_TYPE, user_id: int, msg: str
+    ) -> bool:
+        """
+        Отправка уведомления одному подписчику (не более BROADCAST_CONCURRENCY одновременно).
+        Недоступный чат (бот заблокирован) помечается мёртвым; в этом случае возвращает False.
+        Отписка в БД выполняется пакетно в конце рассылки.
+        """
+        try:
+            async with self._send_semaphore:
+                await context.bot.send_message(
+                    chat_id=user_id,
+                    text=msg,
+                    parse_mode="HTML",
+                    link_preview_options=_NO_PREVIEW,
+                    disable_notification=True,
+                )
+            return True
+        except (Forbidden, ChatMigrated) as e:
+            logger.info("Чат %s недоступен (%s) — отписываем", user_id, e)
+            return False
+
     async def job_check_new_articles(
         self, context: ContextTypes.DEFAULT_TYPE
     ) -> None:
         """Периодическая проверка новых статей и рассылка подписчикам."""
         logger.info("Проверка новых статей…")
-        articles = await run_blocking(fetch_latest, 10)
-        users = await run_blocking(get_subscribed_users)
-
-        for article in articles:
-            if await run_blocking(article_exists, article["url"]):
-                continue
-
-            await run_blocking(
-                add_article,
-                article["title"],
-                article["url"],
-                article.get("summary"),
-            )
-
+        articles = await cached_fetch_latest(10)
+        if self._subscribers is None:
+            # Webhook: post_init не вызывается — загружаем при первой рассылке
+            self._subscribers = set(await run_db(get_subscribed_users))
+        users = list(self._subscribers)
+        dead: list[int] = []
+        sent: list[tuple[int, str]] = []
+
+        new_articles = await self._store_new_articles(articles)
+
+        for article in new_articles:
+            summary = article.get("summary") or ""
             title_safe = escape_html(article["title"])
-            summary_safe = escape_html(article.get("summary", "")) if article.get("summary") else ""
-            url_safe = article["url"].replace('"', "&quot;")
+            summary_safe = escape_html(summary)
+            url_safe = escape_url_attr(article["url"])
 
             msg = f"📰 <b>Новая статья</b>\n\n<b>{title_safe}</b>\n\n"
             if summary_safe:
                 msg += f"{summary_safe}\n\n"
-            msg += f'🔗 <a href="{url_safe}">Читать</a>'
-
-            for user_id in users:
-                try:
-                    await context.bot.send_message(
-                        chat_id=user_id,
-                        text=truncate_message(msg),
-                        parse_mode="HTML",
-                    )
-                    await asyncio.sleep(0.1)
-                except Exception as e:
-                    logger.warning("Не удалось отправить уведомление %s: %s", user_id, e)
+            msg = truncate_message(msg + f'🔗 <a href="{url_safe}">Читать</a>')
+
+            results = await asyncio.gather(
+                *(self._send_notification(context, user_id, msg) for user_id in users),
+                return_exceptions=True,
+            )
+            active = []
+            for user_id, res in zip(users, results):
+                if isinstance(res, Exception):
+                    logger.warning("Не удалось отправить уведомление %s: %s", user_id, res)
+                    active.append(user_id)
+                elif res:
+                    active.append(user_id)
+                    sent.append((user_id, article["url"]))
+                else:
+                    dead.append(user_id)
+            # Отписанным следующие статьи не отправляем
+            users = active
+
+        if sent:
+            await run_db(add_notifications, sent)
+        if dead:
+            await run_db(set_subscriptions, dead, False)
+            for user_id in dead:
+                self._update_subscriber_cache(user_id, False)
 
     def run(self) -> None:
         """Запуск бота (polling, для локальной разработки)."""
@@ -616,6 +818,7 @@ class OkolicaBot:
             interval=timedelta(minutes=JOB_CHECK_INTERVAL_MINUTES),
             first=15,
         )
+        self.application.post_init = self._load_subscribers
         logger.info("Бот запущен (polling)")
         self.application.run_polling()
 
@@ -643,6 +846,12 @@ def main() -> None:
         print("Создайте файл .env с TELEGRAM_BOT_TOKEN=ваш_токен")
         return
 
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     bot = OkolicaBot(BOT_TOKEN)
     bot.run()
 
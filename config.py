@@ -45,6 +45,17 @@ OKOLICA_ARCHIVE_CATEGORY_PAGES = 10  # страниц для разделов go
 ARTICLES_LIMIT_ARCHIVE = 15  # лимит результатов для поиска по архиву
 ARCHIVE_SEARCH_MAX_ATTEMPTS = 10  # макс. HTTP-запросов на один поиск по архиву
 JOB_CHECK_INTERVAL_MINUTES = 30
+LATEST_CACHE_TTL = 60  # сек., кэш последних новостей с сайта
+WEATHER_CACHE_TTL = 900  # сек., кэш погоды (текущие данные Open-Meteo обновляются раз в 15 мин.)
+WEBHOOK_MAX_CONCURRENT_UPDATES = 8  # одновременных update на один контейнер
+WEBHOOK_RESPONSE_TIMEOUT = 25  # сек., ожидание обработки update до ответа Telegram (maxDuration в vercel.json — 30)
+POLLING_MAX_CONCURRENT_UPDATES = 16  # одновременных update при polling (разные чаты)
+BROADCAST_CONCURRENCY = 25  # одновременных отправок при рассылке подписчикам
+DB_POOL_WORKERS = 4  # потоков для запросов к БД
+IO_POOL_WORKERS = 16  # потоков для HTTP-запросов парсера
+PARSER_PAGE_WORKERS = 8  # одновременных загрузок страниц okolica.net при поиске
+PARSER_PAGE_LOOKAHEAD = 3  # страниц раздела, запрашиваемых наперёд (после 404 лишних — не больше LOOKAHEAD-1)
+OKOLICA_CACHE_TTL = 300  # сек., кэш загруженных RSS/разделов/архива okolica.net
 
 # HTTP
 REQUEST_TIMEOUT = 10
@@ -2,19 +2,81 @@
 # -*- coding: utf-8 -*-
 """Модуль работы с базой данных"""
 
+import logging
+import queue
+import re
 import sqlite3
+import threading
+from collections import OrderedDict
 from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 
 from config import DB_PATH
 
+logger = logging.getLogger(__name__)
+
+# LRU недавно встречавшихся URL статей, которые точно есть в БД (статьи не удаляются).
+# Позволяет не ходить в SQLite за «горячими» статьями.
+_RECENT_URLS_MAX = 2048
+_recent_urls: "OrderedDict[str, None]" = OrderedDict()
+_recent_urls_lock = threading.Lock()
+
+
+def _remember_urls(urls) -> None:
+    """Добавление URL в LRU известных статей (с вытеснением самых старых)."""
+    with _recent_urls_lock:
+        for url in urls:
+            _recent_urls[url] = None
+            _recent_urls.move_to_end(url)
+        while len(_recent_urls) > _RECENT_URLS_MAX:
+            _recent_urls.popitem(last=False)
+
+
+def _recent_url_hits(urls) -> Set[str]:
+    """URL из списка, найденные в LRU (отмечаются как недавно использованные)."""
+    hits: Set[str] = set()
+    with _recent_urls_lock:
+        for url in urls:
+            if url in _recent_urls:
+                _recent_urls.move_to_end(url)
+                hits.add(url)
+    return hits
+
+
+# Настройки соединения: действуют на одно подключение, поэтому задаются при каждом открытии.
+# WAL (режим журнала) сохраняется в файле БД и включается один раз в init_database().
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # ~64 МБ кэша страниц
+    "PRAGMA busy_timeout=5000",  # ждать блокировку до 5 с вместо «database is locked»
+    "PRAGMA mmap_size=268435456",
+)
+
+
+# Пул открытых подключений: повторное использование сохраняет кэш страниц SQLite
+# и избавляет от открытия .db/-wal/-shm на каждый запрос
+_POOL_SIZE = 8
+_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=_POOL_SIZE)
+
+
+def _connect() -> sqlite3.Connection:
+    """Новое подключение с настройками _CONNECTION_PRAGMAS."""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
 
 @contextmanager
 def get_connection():
-    """Контекстный менеджер для подключения к БД."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """Контекстный менеджер для подключения к БД (берётся из пула и возвращается в него)."""
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _connect()
     try:
         yield conn
         conn.commit()
@@ -22,12 +84,17 @@ def get_connection():
         conn.rollback()
         raise
     finally:
-        conn.close()
+        try:
+            _pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
 
 
 def init_database() -> None:
     """Инициализация схемы базы данных."""
     with get_connection() as conn:
+        # WAL: чтения (проверка статей) не блокируются записью (парсер, подписки)
+        conn.execute("PRAGMA journal_mode=WAL")
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -75,6 +142,79 @@ def init_database() -> None:
             )
         """)
 
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+
+        # Индексы горячих запросов: выборка подписчиков, последние статьи, уведомления
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_users_subscribed
+            ON users (telegram_id) WHERE is_subscribed = 1
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_articles_published
+            ON articles (published_at DESC)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_notifications_user
+            ON notifications (user_id, article_id)
+        """)
+
+        _init_fulltext(conn)
+
+
+def _init_fulltext(conn: sqlite3.Connection) -> None:
+    """
+    Полнотекстовый индекс FTS5 по заголовку и анонсу статей, синхронизируемый триггерами.
+    Если SQLite собран без FTS5, search_articles() работает через LIKE.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+    ).fetchone()
+    if exists:
+        return
+    try:
+        conn.executescript("""
+            CREATE VIRTUAL TABLE articles_fts USING fts5(
+                title, summary,
+                content='articles', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts (rowid, title, summary)
+                VALUES (new.id, new.title, new.summary);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, summary)
+                VALUES ('delete', old.id, old.title, old.summary);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, summary)
+                VALUES ('delete', old.id, old.title, old.summary);
+                INSERT INTO articles_fts (rowid, title, summary)
+                VALUES (new.id, new.title, new.summary);
+            END;
+            -- Индексация статей, сохранённых до появления FTS
+            INSERT INTO articles_fts (articles_fts) VALUES ('rebuild');
+        """)
+    except sqlite3.OperationalError as e:
+        logger.warning("FTS5 недоступен, поиск по базе через LIKE: %s", e)
+
+
+# RETURNING поддерживается с SQLite 3.35
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+_UPSERT_USER_SQL = """
+    INSERT INTO users (telegram_id, username, first_name, last_name)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(telegram_id) DO UPDATE SET
+        username = excluded.username,
+        first_name = excluded.first_name,
+        last_name = excluded.last_name
+"""
 
 
 def add_user(
@@ -82,29 +222,44 @@ def add_user(
     username: Optional[str] = None,
     first_name: Optional[str] = None,
     last_name: Optional[str] = None,
-) -> None:
-    """Регистрация или обновление пользователя."""
+) -> bool:
+    """Регистрация или обновление пользователя. Возвращает статус подписки."""
+    params = (telegram_id, username, first_name, last_name)
     with get_connection() as conn:
-        conn.execute(
-            """
-            INSERT INTO users (telegram_id, username, first_name, last_name)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(telegram_id) DO UPDATE SET
-                username = excluded.username,
-                first_name = excluded.first_name,
-                last_name = excluded.last_name
-            """,
-            (telegram_id, username, first_name, last_name),
-        )
+        if _HAS_RETURNING:
+            # Статус подписки возвращает сам upsert — без второго запроса
+            row = conn.execute(_UPSERT_USER_SQL + " RETURNING is_subscribed", params).fetchone()
+        else:
+            conn.execute(_UPSERT_USER_SQL, params)
+            row = conn.execute(
+                "SELECT is_subscribed FROM users WHERE telegram_id = ?", (telegram_id,)
+            ).fetchone()
+        return bool(row and row[0])
 
 
-def set_subscription(telegram_id: int, subscribed: bool) -> None:
-    """Обновление статуса подписки пользователя."""
+def set_subscription(telegram_id: int, subscribed: bool) -> bool:
+    """
+    Обновление статуса подписки пользователя.
+    Возвращает False, если пользователь не зарегистрирован.
+    """
     with get_connection() as conn:
-        conn.execute(
+        cursor = conn.execute(
             "UPDATE users SET is_subscribed = ? WHERE telegram_id = ?",
             (1 if subscribed else 0, telegram_id),
         )
+        return cursor.rowcount > 0
+
+
+def set_subscriptions(telegram_ids: List[int], subscribed: bool) -> None:
+    """Пакетное обновление статуса подписки одной транзакцией."""
+    if not telegram_ids:
+        return
+    value = 1 if subscribed else 0
+    with get_connection() as conn:
+        conn.executemany(
+            "UPDATE users SET is_subscribed = ? WHERE telegram_id = ?",
+            [(value, telegram_id) for telegram_id in telegram_ids],
+        )
 
 
 def get_subscribed_users() -> List[int]:
@@ -127,30 +282,150 @@ def add_article(title: str, url: str, summary: Optional[str] = None) -> Optional
             """,
             (title, url, summary or "", datetime.now().isoformat()),
         )
-        return cursor.lastrowid if cursor.lastrowid else None
+        # При IGNORE lastrowid остаётся от прошлой вставки на этом подключении — смотрим rowcount
+        article_id = cursor.lastrowid if cursor.rowcount > 0 else None
+    _remember_urls((url,))
+    return article_id
+
+
+# 4 параметра на статью — в пределах лимита 999
+_INSERT_CHUNK_ROWS = 200
+
+
+def add_articles(articles: List[Dict]) -> List[Dict]:
+    """
+    Пакетное добавление статей одной транзакцией (дубликаты по URL пропускаются).
+    Возвращает действительно добавленные статьи: результат INSERT OR IGNORE
+    заменяет отдельную проверку существования.
+    """
+    known = _recent_url_hits(a["url"] for a in articles)
+    candidates = [a for a in articles if a["url"] not in known]
+    if not candidates:
+        return []
+    now = datetime.now().isoformat()
+    inserted = []
+    with get_connection() as conn:
+        if _HAS_RETURNING:
+            # Многострочный VALUES с RETURNING: один оператор на _INSERT_CHUNK_ROWS статей.
+            # executemany с RETURNING строк не возвращает, поэтому не подходит.
+            by_url: Dict[str, Dict] = {}
+            for a in candidates:
+                by_url.setdefault(a["url"], a)
+            for i in range(0, len(candidates), _INSERT_CHUNK_ROWS):
+                chunk = candidates[i : i + _INSERT_CHUNK_ROWS]
+                params = []
+                for a in chunk:
+                    params.extend((a["title"], a["url"], a.get("summary") or "", now))
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO articles (title, url, summary, published_at) VALUES "
+                    + ",".join(["(?, ?, ?, ?)"] * len(chunk))
+                    + " RETURNING url",
+                    params,
+                )
+                inserted.extend(by_url[row[0]] for row in cursor.fetchall())
+        else:
+            for a in candidates:
+                cursor = conn.execute(
+                    """
+                    INSERT OR IGNORE INTO articles (title, url, summary, published_at)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (a["title"], a["url"], a.get("summary") or "", now),
+                )
+                if cursor.rowcount > 0:
+                    inserted.append(a)
+    _remember_urls(a["url"] for a in candidates)
+    return inserted
+
+
+def add_notifications(sent: List[Tuple[int, str]]) -> None:
+    """
+    Запись отправленных уведомлений (telegram_id, url статьи) одной транзакцией.
+    article_id берётся по URL, поэтому статьи должны быть уже сохранены.
+    """
+    if not sent:
+        return
+    with get_connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO notifications (user_id, article_id)
+            SELECT ?, id FROM articles WHERE url = ?
+            """,
+            sent,
+        )
 
 
 def article_exists(url: str) -> bool:
     """Проверка существования статьи по URL."""
+    if _recent_url_hits((url,)):
+        return True
     with get_connection() as conn:
         cursor = conn.execute("SELECT 1 FROM articles WHERE url = ? LIMIT 1", (url,))
-        return cursor.fetchone() is not None
+        exists = cursor.fetchone() is not None
+    if exists:
+        _remember_urls((url,))
+    return exists
+
+
+# Лимит параметров в одном запросе (SQLITE_MAX_VARIABLE_NUMBER в старых сборках — 999)
+_IN_CHUNK_SIZE = 500
+
+
+def get_existing_urls(urls: List[str]) -> Set[str]:
+    """Подмножество переданных URL, которые уже есть в базе (один запрос на 500 URL)."""
+    existing = _recent_url_hits(urls)
+    urls = [u for u in urls if u not in existing]
+    if not urls:
+        return existing
+    found: Set[str] = set()
+    with get_connection() as conn:
+        for i in range(0, len(urls), _IN_CHUNK_SIZE):
+            chunk = urls[i : i + _IN_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(
+                f"SELECT url FROM articles WHERE url IN ({placeholders})",
+                chunk,
+            )
+            found.update(row[0] for row in cursor.fetchall())
+    _remember_urls(found)
+    return existing | found
+
+
+def _fts_query(query: str) -> str:
+    """Запрос FTS5: все слова, каждое — как префикс («слово*»)."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", query))
 
 
 def search_articles(query: str, limit: int = 10) -> List[Dict]:
-    """Поиск статей в локальной базе."""
-    pattern = f"%{query}%"
+    """Поиск статей в локальной базе (FTS5 с ранжированием bm25, иначе LIKE)."""
+    match = _fts_query(query)
+    if not match:
+        return []
     with get_connection() as conn:
-        cursor = conn.execute(
-            """
-            SELECT title, url, summary, published_at
-            FROM articles
-            WHERE title LIKE ? OR summary LIKE ?
-            ORDER BY published_at DESC
-            LIMIT ?
-            """,
-            (pattern, pattern, limit),
-        )
+        try:
+            cursor = conn.execute(
+                """
+                SELECT a.title, a.url, a.summary, a.published_at
+                FROM articles_fts f
+                JOIN articles a ON a.id = f.rowid
+                WHERE articles_fts MATCH ?
+                ORDER BY bm25(articles_fts)
+                LIMIT ?
+                """,
+                (match, limit),
+            )
+        except sqlite3.OperationalError:
+            pattern = f"%{query}%"
+            cursor = conn.execute(
+                """
+                SELECT title, url, summary, published_at
+                FROM articles
+                WHERE title LIKE ? OR summary LIKE ?
+                ORDER BY published_at DESC
+                LIMIT ?
+                """,
+                (pattern, pattern, limit),
+            )
         return [_row_to_article(row) for row in cursor.fetchall()]
 
 
@@ -175,6 +450,25 @@ def add_feedback(user_id: int, message: str) -> None:
         conn.execute("INSERT INTO feedback (user_id, message) VALUES (?, ?)", (user_id, message))
 
 
+def get_setting(key: str) -> Optional[str]:
+    """Значение служебной настройки (например, file_id фото приветствия)."""
+    with get_connection() as conn:
+        row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+
+def set_setting(key: str, value: str) -> None:
+    """Сохранение служебной настройки."""
+    with get_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO settings (key, value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+            """,
+            (key, value),
+        )
+
+
 def _row_to_article(row: sqlite3.Row) -> Dict:
     """Преобразование строки БД в словарь статьи."""
     return {
@@ -4,12 +4,18 @@
 
 import logging
 import re
+import threading
 import time
 import xml.etree.ElementTree as ET
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, wraps
+from itertools import chain
+from typing import Optional
 from urllib.parse import quote
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
+from requests.adapters import HTTPAdapter
 
 from config import (
     SITE_URL,
@@ -24,6 +30,14 @@ from config import (
     OKOLICA_GAZETA_PAGES_ARCHIVE,
     OKOLICA_ARCHIVE_CATEGORY_PAGES,
     ARCHIVE_SEARCH_MAX_ATTEMPTS,
+    PARSER_PAGE_WORKERS,
+    PARSER_PAGE_LOOKAHEAD,
+    OKOLICA_CACHE_TTL,
+    WEATHER_CITY,
+    WEATHER_LAT,
+    WEATHER_LON,
+    WEATHER_TIMEZONE,
+    WEATHER_CACHE_TTL,
 )
 
 # Разделы okolica.net для расширенного поиска (пустая строка = главная лента)
@@ -56,6 +70,94 @@ _SYNONYMS = {
 
 logger = logging.getLogger(__name__)
 
+# Парсер для BeautifulSoup: lxml (C, libxml2) в разы быстрее встроенного html.parser
+try:
+    import lxml  # noqa: F401
+    _HTML_PARSER = "lxml"
+except ImportError:
+    _HTML_PARSER = "html.parser"
+
+# lxml.etree — разбор RSS парсером libxml2 (с восстановлением после ошибок разметки)
+try:
+    from lxml import etree as _lxml_etree
+    _XML_ERRORS = (ET.ParseError, _lxml_etree.XMLSyntaxError)
+except ImportError:
+    _lxml_etree = None
+    _XML_ERRORS = (ET.ParseError,)
+
+# selectolax (C-движок lexbor) — для горячих страниц со ссылками; без него — BeautifulSoup
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Регулярные выражения компилируются один раз при импорте
+_RE_TOKEN = re.compile(r"[а-яёa-z0-9]+")
+_RE_WORD = re.compile(r"[а-яёa-z]{2,}")
+_RE_ARTICLE_URL = re.compile(r"/news/[^/]+/\d+\.html")
+_RE_TAIL_BRACKETS = re.compile(r"\s*\[\.\.\.\]\s*$")
+_RE_WS = re.compile(r"\s+")
+
+# Дедупликация почти одинаковых новостей: длина общего префикса заголовка
+# и сколько статей с таким префиксом оставлять
+_TITLE_PREFIX_LEN = 60
+_TITLE_PREFIX_MAX = 3
+
+# Размер куска при потоковой загрузке RSS и сколько байт начала искать объявление кодировки
+_RSS_CHUNK_SIZE = 16 * 1024
+_RSS_SNIFF_BYTES = 100
+
+# Общая HTTP-сессия: keep-alive соединения с okolica.net, sibokolica.ru и Open-Meteo
+# переиспользуются между запросами вместо TLS-рукопожатия на каждый вызов.
+# Повторы при 503/ошибках сети выполняет _make_request.
+_session = requests.Session()
+_session.headers.update({
+    "User-Agent": USER_AGENT,
+    "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.8",
+})
+# Accept для страниц и RSS; сессионные заголовки (User-Agent, язык) добавляются сами.
+# Отдельно от сессии: запрос погоды к JSON API передаёт свои заголовки
+_PAGE_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+# pool_maxsize — с запасом на потоки IO-пула бота и параллельную загрузку страниц
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+# Параллельная загрузка: источники (RSS, gazeta) и отдельные страницы — в разных пулах,
+# чтобы задача источника, ожидающая свои страницы, не занимала поток загрузки страниц
+_source_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="okolica-src")
+_page_executor = ThreadPoolExecutor(max_workers=PARSER_PAGE_WORKERS, thread_name_prefix="okolica-page")
+
+
+def _ttl_cache(ttl: float):
+    """
+    Потокобезопасный кэш результата функции на ttl секунд (по позиционным аргументам).
+    Одновременные вызовы ждут одну загрузку; пустые результаты не кэшируются.
+    """
+    def decorator(func):
+        cache: dict = {}
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args):
+            entry = cache.get(args)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            with lock:
+                entry = cache.get(args)
+                if entry is not None and entry[0] > time.monotonic():
+                    return entry[1]
+                result = func(*args)
+                if result:
+                    cache[args] = (time.monotonic() + ttl, result)
+                return result
+
+        return wrapper
+    return decorator
+
+
 _morph_analyzer = None
 
 
@@ -109,7 +211,7 @@ def _extract_and_expand_query(query: str) -> list[str]:
     Извлечение слов из запроса: токенизация, стоп-слова, стемминг, синонимы.
     Возвращает список нормализованных слов (без дубликатов).
     """
-    words = [w for w in re.findall(r"[а-яёa-z0-9]+", query.lower()) if len(w) >= 2]
+    words = [w for w in _RE_TOKEN.findall(query.lower()) if len(w) >= 2]
     words = [w for w in words if w not in _STOP_WORDS]
     if not words:
         return []
@@ -127,23 +229,25 @@ def _extract_and_expand_query(query: str) -> list[str]:
     return _expand_with_synonyms(normalized)
 
 
-def _make_request(url: str, params: dict = None, retries: int = 2) -> requests.Response:
-    """Выполнение HTTP-запроса с общими настройками и повтором при 5xx."""
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.8",
-    }
+def _make_request(
+    url: str, params: dict = None, retries: int = 2, stream: bool = False
+) -> requests.Response:
+    """
+    Выполнение HTTP-запроса с общими настройками и повтором при 5xx.
+    stream=True — тело не загружается сразу (читать через iter_content и закрыть ответ).
+    """
     last_error = None
     for attempt in range(retries + 1):
         try:
-            resp = requests.get(
+            resp = _session.get(
                 url,
                 params=params,
-                headers=headers,
+                headers=_PAGE_HEADERS,
                 timeout=REQUEST_TIMEOUT,
+                stream=stream,
             )
             if resp.status_code == 503 and attempt < retries:
+                resp.close()
                 time.sleep(1.5 * (attempt + 1))
                 continue
             return resp
@@ -161,24 +265,12 @@ def get_latest_articles(limit: int = 10) -> list[dict]:
         response.encoding = "utf-8"
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, "html.parser")
         articles = []
 
-        for h2 in soup.find_all("h2"):
-            link = h2.find("a")
-            if not link or not link.get("href") or ".html" not in link.get("href", ""):
-                continue
-
-            href = link.get("href", "")
-            if not href.startswith("http"):
-                href = SITE_URL + (href if href.startswith("/") else "/" + href)
-
-            title = h2.get_text(strip=True)
+        for href, title, summary in _iter_h2_articles(response.text, max_len=200):
             if not title:
                 continue
 
-            summary = _extract_summary(h2, title, max_len=200)
-
             articles.append({"title": title, "url": href, "summary": summary})
 
             if len(articles) >= limit:
@@ -191,22 +283,104 @@ def get_latest_articles(limit: int = 10) -> list[dict]:
         return []
 
 
+def _iter_h2_articles(html: str, max_len: int):
+    """
+    Статьи sibokolica.ru из заголовков <h2><a href="….html">: (url, заголовок, описание).
+    Разбор через selectolax, если установлен, иначе через BeautifulSoup.
+    """
+    if LexborHTMLParser is not None:
+        for h2 in LexborHTMLParser(html).css("h2"):
+            link = h2.css_first("a")
+            href = link.attributes.get("href") if link is not None else None
+            if not href or ".html" not in href:
+                continue
+            title = h2.text(strip=True)
+            yield _site_url(href), title, _extract_summary_lexbor(h2, title, max_len)
+        return
+
+    soup = BeautifulSoup(html, _HTML_PARSER)
+    for h2 in soup.find_all("h2"):
+        link = h2.find("a")
+        if not link or not link.get("href") or ".html" not in link.get("href", ""):
+            continue
+        title = h2.get_text(strip=True)
+        yield _site_url(link.get("href", "")), title, _extract_summary(h2, title, max_len)
+
+
+def _site_url(href: str) -> str:
+    """Абсолютный URL sibokolica.ru."""
+    if href.startswith("http"):
+        return href
+    return SITE_URL + (href if href.startswith("/") else "/" + href)
+
+
+def _pick_summary(texts, exclude_text: str, max_len: int) -> Optional[str]:
+    """Первый подходящий текст блока как описание (обрезается до max_len)."""
+    for txt in texts:
+        if (
+            txt
+            and txt != exclude_text
+            and 30 < len(txt) < 300
+            and not txt.startswith("http")
+        ):
+            return txt[:max_len] + ("..." if len(txt) > max_len else "")
+    return None
+
+
+def _iter_text_blocks(node, checked=None):
+    """
+    Теги p/div внутри node в порядке документа (как find_all).
+    Потомки checked не обходятся: это поддерево уже проверено на предыдущем уровне.
+    """
+    for child in node.children:
+        if not isinstance(child, Tag):
+            continue
+        if child.name in ("p", "div"):
+            yield child
+        if child is not checked:
+            yield from _iter_text_blocks(child, checked)
+
+
 def _extract_summary(anchor_element, exclude_text: str, max_len: int = 200) -> str:
-    """Извлечение краткого описания из родительских элементов."""
+    """
+    Извлечение краткого описания из родительских элементов.
+    Подъём по предкам за один проход: каждый узел проверяется один раз.
+    """
+    checked = None
     parent = anchor_element.parent
     for _ in range(5):
         if not parent:
             break
-        for elem in parent.find_all(["p", "div"]):
-            txt = elem.get_text(strip=True)
-            if (
-                txt
-                and txt != exclude_text
-                and 30 < len(txt) < 300
-                and not txt.startswith("http")
-                and elem != anchor_element
-            ):
-                return txt[:max_len] + ("..." if len(txt) > max_len else "")
+        summary = _pick_summary(
+            (elem.get_text(strip=True) for elem in _iter_text_blocks(parent, checked)
+             if elem is not anchor_element),
+            exclude_text,
+            max_len,
+        )
+        if summary is not None:
+            return summary
+        checked = parent
+        parent = parent.parent
+    return ""
+
+
+def _extract_summary_lexbor(anchor_node, exclude_text: str, max_len: int = 200) -> str:
+    """То же, что _extract_summary, для узла selectolax."""
+    parent = anchor_node.parent
+    for _ in range(5):
+        if parent is None:
+            break
+        parent_id = parent.mem_id
+        summary = _pick_summary(
+            # css() в lexbor включает сам узел, если он подходит под селектор.
+            # Сравнение по mem_id: == у Node сериализует оба поддерева в HTML
+            (elem.text(strip=True) for elem in parent.css("p, div")
+             if elem.mem_id != parent_id),
+            exclude_text,
+            max_len,
+        )
+        if summary is not None:
+            return summary
         parent = parent.parent
     return ""
 
@@ -218,54 +392,95 @@ def _elem_text(el) -> str:
     return "".join(el.itertext()).strip()
 
 
-def _fetch_okolica_rss() -> list[dict]:
+def _drain_rss_items(parser):
+    """Готовые элементы <item> из потокового парсера; после обработки очищаются."""
+    for _, elem in parser.read_events():
+        if elem.tag == "item":
+            yield elem
+            elem.clear()
+
+
+def _iter_rss_items(chunks):
     """
-    Загрузка статей из RSS okolica.net.
-    RSS содержит title, description, fulltext — идеально для поиска.
+    Потоковый разбор RSS по мере загрузки: куски ответа подаются в парсер сразу,
+    элементы <item> отдаются по одному, тело целиком в памяти не собирается.
+    Кодировку из заголовка <?xml encoding="windows-1251"?> парсер учитывает сам.
+    Без объявления тело собирается целиком и декодируется _decode_okolica
+    (cp1251, запасной вариант — utf-8), как раньше.
+    lxml (если установлен) разбирает байты в C и не падает на мелких ошибках разметки.
     """
-    try:
-        url = f"{OLD_SITE_URL}/news/rss.xml"
-        response = _make_request(url)
-        response.raise_for_status()
-        try:
-            text = response.content.decode("cp1251")
-        except UnicodeDecodeError:
-            text = response.content.decode("utf-8", errors="replace")
-        root = ET.fromstring(text)
-        items = root.findall(".//item")
+    chunks = iter(chunks)
+    # Начало документа — до конца XML-объявления или первых _RSS_SNIFF_BYTES байт
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= _RSS_SNIFF_BYTES or b"?>" in head:
+            break
+    if b"encoding=" in head[:_RSS_SNIFF_BYTES]:
+        body = chain((head,), chunks)
+    else:
+        body = (_decode_okolica(head + b"".join(chunks)),)
+
+    if _lxml_etree is not None:
+        parser = _lxml_etree.XMLPullParser(events=("end",), tag="item", recover=True)
+    else:
+        parser = ET.XMLPullParser(events=("end",))
+    for chunk in body:
+        parser.feed(chunk)
+        yield from _drain_rss_items(parser)
+    parser.close()
+    yield from _drain_rss_items(parser)
+
+
+def _parse_rss_items(chunks) -> list[dict]:
+    """Статьи из потока кусков RSS okolica.net."""
+    articles = []
+    for item in _iter_rss_items(chunks):
+        link_el = item.find("link")
+        if link_el is None or not link_el.text or "/news/" not in link_el.text:
+            continue
 
-        articles = []
-        for item in items:
-            link_el = item.find("link")
-            if link_el is None or not link_el.text or "/news/" not in link_el.text:
-                continue
+        url_str = link_el.text.strip()
+        if not url_str.startswith("http"):
+            url_str = f"{OLD_SITE_URL}{url_str}" if url_str.startswith("/") else url_str
+        url_str = _force_https(url_str)
 
-            url_str = link_el.text.strip()
-            if not url_str.startswith("http"):
-                url_str = f"{OLD_SITE_URL}{url_str}" if url_str.startswith("/") else url_str
-            url_str = url_str.replace("http://", "https://", 1)
+        title_el = item.find("title")
+        title = _elem_text(title_el)
+        if not title:
+            continue
 
-            title_el = item.find("title")
-            title = _elem_text(title_el)
-            if not title:
-                continue
+        desc_el = item.find("description")
+        summary = _elem_text(desc_el)[:200] if desc_el is not None else ""
 
-            desc_el = item.find("description")
-            summary = _elem_text(desc_el)[:200] if desc_el is not None else ""
+        full_el = item.find("fulltext")
+        fulltext = _elem_text(full_el) if full_el is not None else ""
 
-            full_el = item.find("fulltext")
-            fulltext = _elem_text(full_el) if full_el is not None else ""
+        articles.append({
+            "title": title,
+            "url": url_str,
+            "summary": summary,
+            "_fulltext": fulltext,
+            "_key": _canon_url(url_str),
+        })
+
+    return articles
 
-            articles.append({
-                "title": title,
-                "url": url_str,
-                "summary": summary,
-                "_fulltext": fulltext,
-            })
 
+@_ttl_cache(OKOLICA_CACHE_TTL)
+def _fetch_okolica_rss() -> list[dict]:
+    """
+    Загрузка статей из RSS okolica.net.
+    RSS содержит title, description, fulltext — идеально для поиска.
+    """
+    try:
+        url = f"{OLD_SITE_URL}/news/rss.xml"
+        with _make_request(url, stream=True) as response:
+            response.raise_for_status()
+            articles = _parse_rss_items(response.iter_content(_RSS_CHUNK_SIZE))
         return articles
 
-    except ET.ParseError as e:
+    except _XML_ERRORS as e:
         logger.error("Ошибка парсинга RSS okolica.net: %s", e)
         return []
     except Exception as e:
@@ -273,101 +488,199 @@ def _fetch_okolica_rss() -> list[dict]:
         return []
 
 
+def _force_https(url: str) -> str:
+    """Замена схемы http:// на https:// — только в начале, без поиска по всей строке."""
+    if url.startswith("http://"):
+        return "https://" + url[7:]
+    return url
+
+
+def _canon_url(url: str) -> str:
+    """Ключ дедупликации URL: https и без завершающего слэша."""
+    return _force_https(url).rstrip("/")
+
+
 def _normalize_article_url(href: str) -> str:
     """Нормализация URL статьи для дедупликации."""
     href = href.strip()
     if href.startswith("http"):
-        return href.replace("http://", "https://", 1).rstrip("/")
+        return _canon_url(href)
     if href.startswith("/"):
-        return (OLD_SITE_URL + href).replace("http://", "https://", 1).rstrip("/")
-    return (OLD_SITE_URL + "/" + href).replace("http://", "https://", 1).rstrip("/")
+        return _canon_url(OLD_SITE_URL + href)
+    return _canon_url(OLD_SITE_URL + "/" + href)
 
 
-def _fetch_okolica_html_from_path(
-    base_path: str, max_pages: int, seen_urls: set
-) -> list[dict]:
-    """Загрузка статей с одной секции (news, news/rayon, news/busines, news/pub)."""
-    articles = []
+def _decode_okolica(content: bytes) -> str:
+    """Декодирование страницы okolica.net (cp1251, запасной вариант — utf-8)."""
+    try:
+        return content.decode("cp1251")
+    except UnicodeDecodeError:
+        return content.decode("utf-8", errors="replace")
+
+
+def _fetch_okolica_page(url: str) -> Optional[str]:
+    """Загрузка одной страницы okolica.net. None — страницы нет (404)."""
+    response = _make_request(url)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return _decode_okolica(response.content)
+
+
+class _PageWindow:
+    """
+    Загрузка страниц раздела скользящим окном в пуле _page_executor: наперёд
+    запрошено не больше PARSER_PAGE_LOOKAHEAD страниц, следующая запрашивается
+    по готовности предыдущей. После отсутствующей (404) или ошибочной страницы
+    новые не запрашиваются — как при последовательном обходе до первой 404.
+    """
+
+    __slots__ = ("_urls", "_futures", "_lock", "_stopped")
+
+    def __init__(self, urls: list[str], lookahead: int = PARSER_PAGE_LOOKAHEAD):
+        self._urls = urls
+        self._futures: list[Future] = []
+        # RLock: колбэк уже готового future вызывается сразу, внутри _submit_next
+        self._lock = threading.RLock()
+        self._stopped = False
+        with self._lock:
+            for _ in range(min(lookahead, len(urls))):
+                self._submit_next()
+
+    def _submit_next(self) -> None:
+        """Запрос следующей страницы (вызывается под self._lock)."""
+        page = len(self._futures)
+        if self._stopped or page >= len(self._urls):
+            return
+        future = _page_executor.submit(_fetch_okolica_page, self._urls[page])
+        self._futures.append(future)
+        future.add_done_callback(self._on_page_done)
+
+    def _on_page_done(self, future: Future) -> None:
+        with self._lock:
+            if future.cancelled() or future.exception() is not None or future.result() is None:
+                self._stopped = True
+            else:
+                self._submit_next()
+
+    def _stop(self) -> None:
+        with self._lock:
+            self._stopped = True
+            for future in self._futures:
+                future.cancel()
+
+    def collect(self, label: str) -> list[str]:
+        """Тексты загруженных страниц по порядку — до первой отсутствующей или ошибочной."""
+        texts = []
+        page = 0
+        while True:
+            with self._lock:
+                # result() может вернуться раньше, чем колбэк запросил следующую страницу
+                if page == len(self._futures):
+                    self._submit_next()
+                if page == len(self._futures):
+                    break
+                future = self._futures[page]
+            page += 1
+            try:
+                text = future.result()
+            except Exception as e:
+                logger.warning("Ошибка %s page %s: %s", label, page, e)
+                text = None
+            if text is None:
+                self._stop()
+                break
+            texts.append(text)
+        return texts
+
+
+def _section_page_urls(base_path: str, max_pages: int) -> list[str]:
+    """URL страниц раздела новостей okolica.net (news, news/rayon, news/busines, news/pub)."""
     path = f"{OLD_SITE_URL}/news/{base_path}" if base_path else f"{OLD_SITE_URL}/news"
     path = path.rstrip("/")
+    return [f"{path}/?page={page}" if page > 1 else f"{path}/" for page in range(1, max_pages + 1)]
 
-    for page in range(1, max_pages + 1):
-        try:
-            url = f"{path}/?page={page}" if page > 1 else f"{path}/"
-            response = _make_request(url)
-            if response.status_code == 404:
-                break
-            response.raise_for_status()
-            try:
-                text = response.content.decode("cp1251")
-            except UnicodeDecodeError:
-                text = response.content.decode("utf-8", errors="replace")
-            soup = BeautifulSoup(text, "html.parser")
-
-            for a in soup.find_all("a", href=True):
-                href = a.get("href", "").strip()
-                if not href or "rss" in href.lower():
-                    continue
-                if "/top.html" in href or "/last.html" in href:
-                    continue
-                # Поддержка: /news/rayon/123.html, /news/pub/123.html
-                if not re.search(r"/news/[^/]+/\d+\.html", href):
-                    continue
 
-                full_url = _normalize_article_url(href)
-                url_key = full_url.split("?")[0]
-                if url_key in seen_urls:
-                    continue
+def _iter_links(html: str):
+    """Пары (href, текст ссылки) для всех <a href> страницы (selectolax или BeautifulSoup)."""
+    if LexborHTMLParser is not None:
+        for a in LexborHTMLParser(html).css("a[href]"):
+            yield a.attributes.get("href") or "", a.text(strip=True)
+        return
+    for a in BeautifulSoup(html, _HTML_PARSER).find_all("a", href=True):
+        yield a.get("href", ""), a.get_text(strip=True)
 
-                title = a.get_text(strip=True)
-                title = re.sub(r"\s*\[\.\.\.\]\s*$", "", title)
-                if not title or len(title) < 5:
-                    continue
 
-                seen_urls.add(url_key)
-                articles.append({
-                    "title": title,
-                    "url": full_url,
-                    "summary": "",
-                    "_fulltext": "",
-                })
+def _parse_okolica_news_page(text: str, seen_urls: set) -> list[dict]:
+    """Статьи со страницы раздела новостей (уже встречавшиеся URL пропускаются)."""
+    articles = []
+
+    for href, link_text in _iter_links(text):
+        href = href.strip()
+        if not href or "rss" in href.lower():
+            continue
+        if "/top.html" in href or "/last.html" in href:
+            continue
+        # Поддержка: /news/rayon/123.html, /news/pub/123.html
+        if not _RE_ARTICLE_URL.search(href):
+            continue
+
+        full_url = _normalize_article_url(href)
+        url_key = full_url.split("?")[0]
+        if url_key in seen_urls:
+            continue
+
+        title = _RE_TAIL_BRACKETS.sub("", link_text)
+        if not title or len(title) < 5:
+            continue
+
+        seen_urls.add(url_key)
+        articles.append({
+            "title": title,
+            "url": full_url,
+            "summary": "",
+            "_fulltext": "",
+            "_key": full_url,
+        })
+
+    return articles
 
-        except requests.exceptions.HTTPError as e:
-            if e.response is not None and e.response.status_code == 404:
-                break
-            logger.warning("Ошибка HTML okolica.net %s page %s: %s", base_path or "news", page, e)
-            break
-        except Exception as e:
-            logger.warning("Ошибка HTML okolica.net %s page %s: %s", base_path or "news", page, e)
-            break
 
+def _submit_sections(sections: list[tuple[str, int]]) -> list[tuple[str, _PageWindow]]:
+    """Запуск параллельной загрузки разделов [(base_path, max_pages), ...]."""
+    return [
+        (base_path, _PageWindow(_section_page_urls(base_path, max_pages)))
+        for base_path, max_pages in sections
+    ]
+
+
+def _parse_sections(pending: list[tuple[str, _PageWindow]], seen_urls: set) -> list[dict]:
+    """Разбор загруженных разделов по порядку (дедупликация как при последовательном обходе)."""
+    articles = []
+    for base_path, pages in pending:
+        for text in pages.collect(f"HTML okolica.net {base_path or 'news'}"):
+            articles.extend(_parse_okolica_news_page(text, seen_urls))
     return articles
 
 
+def _fetch_okolica_sections(sections: list[tuple[str, int]], seen_urls: set) -> list[dict]:
+    """Загрузка статей нескольких разделов: разделы загружаются параллельно."""
+    return _parse_sections(_submit_sections(sections), seen_urls)
+
+
+@_ttl_cache(OKOLICA_CACHE_TTL)
 def _fetch_okolica_html(max_pages: int = None) -> list[dict]:
     """
     Загрузка статей со всех разделов okolica.net: главная лента + rayon, busines.
     Сайт в cp1251.
     """
-    seen_urls: set = set()
-    all_articles = []
-
-    # Главная лента /news/
-    all_articles.extend(
-        _fetch_okolica_html_from_path("", OKOLICA_HTML_PAGES, seen_urls)
-    )
-
-    # Разделы rayon, busines
-    for cat in _OKOLICA_CATEGORIES:
-        if not cat:
-            continue
-        all_articles.extend(
-            _fetch_okolica_html_from_path(cat, OKOLICA_CATEGORY_PAGES, seen_urls)
-        )
-
-    return all_articles
+    # Главная лента /news/ и разделы rayon, busines, ...
+    sections = [("", OKOLICA_HTML_PAGES)]
+    sections.extend((cat, OKOLICA_CATEGORY_PAGES) for cat in _OKOLICA_CATEGORIES if cat)
+    return _fetch_okolica_sections(sections, set())
 
 
+@_ttl_cache(OKOLICA_CACHE_TTL)
 def _fetch_okolica_gazeta(max_pages: int = None) -> list[dict]:
     """
     Загрузка заголовков статей из архива газеты /gazeta/.
@@ -378,88 +691,85 @@ def _fetch_okolica_gazeta(max_pages: int = None) -> list[dict]:
     all_articles = []
     seen_titles: set = set()
 
-    for page in range(1, max_pages + 1):
-        try:
-            url = f"{OLD_SITE_URL}/gazeta/" + (f"?page={page}" if page > 1 else "")
-            response = _make_request(url)
-            response.raise_for_status()
-            try:
-                text = response.content.decode("cp1251")
-            except UnicodeDecodeError:
-                text = response.content.decode("utf-8", errors="replace")
-            soup = BeautifulSoup(text, "html.parser")
-
-            # Ищем блоки с выпусками: заголовки статей в формате «• Текст • Текст»
-            for elem in soup.find_all(["p", "div", "li", "td"]):
-                txt = elem.get_text(separator=" ", strip=True)
-                if "•" not in txt or len(txt) < 10:
+    urls = [
+        f"{OLD_SITE_URL}/gazeta/" + (f"?page={page}" if page > 1 else "")
+        for page in range(1, max_pages + 1)
+    ]
+    for text in _PageWindow(urls).collect("gazeta okolica.net"):
+        soup = BeautifulSoup(text, _HTML_PARSER)
+
+        # Ищем блоки с выпусками: заголовки статей в формате «• Текст • Текст»
+        for elem in soup.find_all(["p", "div", "li", "td"]):
+            txt = elem.get_text(separator=" ", strip=True)
+            if "•" not in txt or len(txt) < 10:
+                continue
+            # Разбиваем по • и берём каждую часть как заголовок
+            parts = [p.strip() for p in txt.split("•") if len(p.strip()) >= 5]
+            for title in parts:
+                title = _RE_WS.sub(" ", title)
+                if len(title) < 5 or title in seen_titles:
                     continue
-                # Разбиваем по • и берём каждую часть как заголовок
-                parts = [p.strip() for p in txt.split("•") if len(p.strip()) >= 5]
-                for title in parts:
-                    title = re.sub(r"\s+", " ", title)
-                    if len(title) < 5 or title in seen_titles:
-                        continue
-                    seen_titles.add(title)
-                    all_articles.append({
-                        "title": title,
-                        "url": f"{OLD_SITE_URL}/gazeta/",
-                        "summary": "",
-                        "_fulltext": title,
-                    })
-
-        except Exception as e:
-            logger.warning("Ошибка gazeta okolica.net page %s: %s", page, e)
-            break
+                seen_titles.add(title)
+                all_articles.append({
+                    "title": title,
+                    "url": f"{OLD_SITE_URL}/gazeta/",
+                    "summary": "",
+                    "_fulltext": title,
+                })
 
     return all_articles
 
 
-_lemma_cache: dict[str, str] = {}
-_LEMMA_CACHE_MAX = 5000
+@lru_cache(maxsize=8192)
+def _get_lemma(word: str) -> str:
+    """Лемма слова с кэшированием (LRU: при заполнении вытесняются редкие слова)."""
+    return _normalize_word(word)
 
 
-def _get_lemma(word: str) -> str:
-    """Лемма слова с кэшированием."""
-    w = word.lower()
-    if w not in _lemma_cache:
-        if len(_lemma_cache) >= _LEMMA_CACHE_MAX:
-            _lemma_cache.clear()
-        _lemma_cache[w] = _normalize_word(w)
-    return _lemma_cache[w]
+def _index_article(a: dict) -> tuple[str, frozenset, frozenset]:
+    """
+    Поисковый индекс статьи: текст в нижнем регистре, множество лемм его слов
+    и их 3-символьных префиксов. Сохраняется в статье (_index): статьи из кэша
+    источников переиспользуются, и повторные поиски не лемматизируют их заново.
+    """
+    index = a.get("_index")
+    if index is None:
+        searchable_lower = f"{a['title']} {a.get('summary', '')} {a.get('_fulltext', '')}".lower()
+        lemmas = frozenset(_get_lemma(w) for w in set(_RE_WORD.findall(searchable_lower)))
+        prefixes = frozenset(lemma[:3] for lemma in lemmas if len(lemma) >= 3)
+        index = a["_index"] = (searchable_lower, lemmas, prefixes)
+    return index
 
 
-def _word_matches(query_word: str, searchable: str) -> bool:
+def _word_matches(query_word: str, query_lemma: str, related: frozenset, indexed: tuple) -> bool:
     """
     Проверка вхождения слова в текст. Учитывает:
     - точное вхождение подстроки (день в деньги)
     - совпадение по лемме (школа/школы/школьник через pymorphy2)
     - совпадение по префиксу 3 символа (fallback)
+    - леммы, содержащие слово или входящие в него (related)
+    indexed — результат _index_article, query_lemma — лемма query_word,
+    related — такие леммы из всех статей поиска (_related_lemmas).
     """
-    searchable_lower = searchable.lower()
-    if query_word in searchable_lower:
+    searchable_lower, lemmas, prefixes = indexed
+    if query_word in searchable_lower or query_lemma in lemmas:
         return True
+    # Префикс 3+ символов
+    if len(query_lemma) >= 3 and query_lemma[:3] in prefixes:
+        return True
+    return not related.isdisjoint(lemmas)
 
-    query_lemma = _get_lemma(query_word)
-    words_in_text = re.findall(r"[а-яёa-z]{2,}", searchable_lower)
-
-    for w in words_in_text:
-        word_lemma = _get_lemma(w)
-        if query_lemma == word_lemma:
-            return True
-        if query_word in word_lemma or word_lemma in query_word:
-            return True
-        # Префикс 3+ символов
-        if len(query_lemma) >= 3 and len(word_lemma) >= 3:
-            if query_lemma[:3] == word_lemma[:3]:
-                return True
 
-    return False
+def _related_lemmas(query_word: str, vocabulary: frozenset) -> frozenset:
+    """Леммы словаря, содержащие слово запроса или входящие в него."""
+    return frozenset(
+        lemma for lemma in vocabulary if query_word in lemma or lemma in query_word
+    )
 
 
-def _count_matches(query_words: list[str], searchable: str) -> int:
+def _count_matches(query: list[tuple[str, str, frozenset]], indexed: tuple) -> int:
     """Количество совпавших слов запроса (для сортировки по релевантности)."""
-    return sum(1 for w in query_words if _word_matches(w, searchable))
+    return sum(1 for w, lemma, related in query if _word_matches(w, lemma, related, indexed))
 
 
 def _run_search(articles: list[dict], query_words: list[str], limit: int) -> list[dict]:
@@ -470,52 +780,76 @@ def _run_search(articles: list[dict], query_words: list[str], limit: int) -> lis
     if not query_words:
         return []
 
-    # Все слова
-    full_match = []
-    for a in articles:
-        searchable = f"{a['title']} {a.get('summary', '')} {a.get('_fulltext', '')}"
-        if all(_word_matches(w, searchable) for w in query_words):
-            cnt = _count_matches(query_words, searchable)
-            full_match.append((cnt, a))
-
-    if full_match:
-        full_match.sort(key=lambda x: (-x[0], x[1]["title"]))
-        return [
-            {"title": a["title"], "url": a["url"], "summary": a.get("summary", "")}
-            for _, a in full_match[:limit]
-        ]
-
-    # Любое слово
-    any_match = []
-    for a in articles:
-        searchable = f"{a['title']} {a.get('summary', '')} {a.get('_fulltext', '')}"
-        cnt = _count_matches(query_words, searchable)
+    # Индексы статей, леммы запроса и подстрочные совпадения с леммами — один раз:
+    # каждая лемма словаря проверяется на слово запроса однажды, а не в каждой статье
+    indexed = [(_index_article(a), a) for a in articles]
+    vocabulary = frozenset().union(*(idx[1] for idx, _ in indexed))
+    query = [(w, _get_lemma(w), _related_lemmas(w, vocabulary)) for w in query_words]
+
+    # Один проход: число совпавших слов; «все слова» — когда совпали все
+    scored = []
+    for idx, a in indexed:
+        cnt = _count_matches(query, idx)
         if cnt > 0:
-            any_match.append((cnt, a))
+            scored.append((cnt, a))
 
-    any_match.sort(key=lambda x: (-x[0], x[1]["title"]))
+    # Сначала — статьи со всеми словами, иначе — с любым словом
+    full_match = [x for x in scored if x[0] == len(query)]
+    chosen = full_match or scored
+    chosen.sort(key=lambda x: (-x[0], x[1]["title"]))
     return [
         {"title": a["title"], "url": a["url"], "summary": a.get("summary", "")}
-        for _, a in any_match[:limit]
+        for _, a in chosen[:limit]
     ]
 
 
+def _title_signature(title: str) -> str:
+    """Нормализованный заголовок: нижний регистр, схлопнутые пробелы."""
+    return _RE_WS.sub(" ", title.lower()).strip()
+
+
+def _dedupe_rank(a: dict) -> tuple[bool, int]:
+    """Какую из копий статьи оставить: с полным текстом, затем с длинным анонсом."""
+    return bool(a.get("_fulltext")), len(a.get("summary") or "")
+
+
+def _dedupe_by_title(articles) -> list[dict]:
+    """
+    Схлопывание перепубликаций (та же новость под другим URL): одна статья
+    на нормализованный заголовок, не больше _TITLE_PREFIX_MAX на общий префикс.
+    Порядок — по первому вхождению заголовка.
+    """
+    by_title: dict[str, dict] = {}
+    for a in articles:
+        sig = _title_signature(a["title"])
+        kept = by_title.get(sig)
+        if kept is None or _dedupe_rank(a) > _dedupe_rank(kept):
+            by_title[sig] = a
+
+    result = []
+    per_prefix: dict[str, int] = {}
+    for sig, a in by_title.items():
+        prefix = sig[:_TITLE_PREFIX_LEN]
+        count = per_prefix.get(prefix, 0)
+        if count < _TITLE_PREFIX_MAX:
+            per_prefix[prefix] = count + 1
+            result.append(a)
+    return result
+
+
 def _merge_okolica_sources(
     rss_articles: list[dict], html_articles: list[dict], gazeta_articles: list[dict] = None
 ) -> list[dict]:
     """
-    Объединяет RSS, HTML и gazeta. При дубликате по URL приоритет у RSS.
+    Объединяет RSS, HTML и gazeta. При дубликате по URL приоритет у RSS,
+    затем RSS+HTML схлопываются по заголовку (_dedupe_by_title).
     Gazeta: много статей с одним URL, различаются по title.
+    Ключ URL (_key) вычисляется один раз при загрузке статьи.
     """
-    by_url: dict[str, dict] = {}
-    for a in rss_articles:
-        url = a["url"].replace("http://", "https://", 1).rstrip("/")
-        by_url[url] = a
+    by_url: dict[str, dict] = {a["_key"]: a for a in rss_articles}
     for a in html_articles:
-        url = a["url"].replace("http://", "https://", 1).rstrip("/")
-        if url not in by_url:
-            by_url[url] = a
-    result = list(by_url.values())
+        by_url.setdefault(a["_key"], a)
+    result = _dedupe_by_title(by_url.values())
     result.extend(gazeta_articles or [])
     return result
 
@@ -527,8 +861,10 @@ def search_okolica_news(query: str, limit: int = None) -> list[dict]:
     """
     limit = limit or ARTICLES_LIMIT_SEARCH
     try:
-        rss_articles = _fetch_okolica_rss()
+        # RSS — в фоне, разделы HTML — параллельно в текущем потоке
+        rss_future = _source_executor.submit(_fetch_okolica_rss)
         html_articles = _fetch_okolica_html()
+        rss_articles = rss_future.result()
         articles = _merge_okolica_sources(rss_articles, html_articles, gazeta_articles=None)
         if not articles:
             return []
@@ -551,6 +887,12 @@ def search_okolica_archive(query: str, limit: int = None) -> list[dict]:
         seen_urls: set = set()
         all_articles = []
 
+        # HTML: rayon, busines, pub — по pages_per_category страниц на каждый;
+        # загружаются параллельно с RSS, разбираются после него
+        pending = _submit_sections(
+            [(cat, pages_per_category) for cat in ("rayon", "busines", "pub")]
+        )
+
         # RSS — 1 запрос
         rss_articles = _fetch_okolica_rss()
         for a in rss_articles:
@@ -559,13 +901,7 @@ def search_okolica_archive(query: str, limit: int = None) -> list[dict]:
                 seen_urls.add(url_key)
                 all_articles.append(a)
 
-        # HTML: rayon, busines, pub — по pages_per_category страниц на каждый
-        for cat in ["rayon", "busines", "pub"]:
-            all_articles.extend(
-                _fetch_okolica_html_from_path(
-                    cat, pages_per_category, seen_urls
-                )
-            )
+        all_articles.extend(_parse_sections(pending, seen_urls))
 
         if not all_articles:
             return []
@@ -583,9 +919,12 @@ def search_okolica_only(query: str, limit: int = None) -> list[dict]:
     """
     limit = limit or ARTICLES_LIMIT_SEARCH
     try:
-        rss_articles = _fetch_okolica_rss()
+        # Три независимых источника загружаются одновременно
+        rss_future = _source_executor.submit(_fetch_okolica_rss)
+        gazeta_future = _source_executor.submit(_fetch_okolica_gazeta)
         html_articles = _fetch_okolica_html()
-        gazeta_articles = _fetch_okolica_gazeta()
+        rss_articles = rss_future.result()
+        gazeta_articles = gazeta_future.result()
         articles = _merge_okolica_sources(rss_articles, html_articles, gazeta_articles)
         if not articles:
             return []
@@ -616,21 +955,9 @@ def _search_sibokolica(query: str, limit: int) -> list[dict]:
         response.encoding = "utf-8"
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, "html.parser")
         articles = []
 
-        for h2 in soup.find_all("h2"):
-            link = h2.find("a")
-            if not link or not link.get("href") or ".html" not in link.get("href", ""):
-                continue
-
-            href = link.get("href", "")
-            if not href.startswith("http"):
-                href = SITE_URL + (href if href.startswith("/") else "/" + href)
-
-            title = h2.get_text(strip=True)
-            summary = _extract_summary(h2, title, max_len=150)
-
+        for href, title, summary in _iter_h2_articles(response.text, max_len=150):
             articles.append({"title": title, "url": href, "summary": summary})
             if len(articles) >= limit:
                 break
@@ -642,6 +969,8 @@ def _search_sibokolica(query: str, limit: int) -> list[dict]:
         return []
 
 
+_WEATHER_API_URL = "https://api.open-meteo.com/v1/forecast"
+
 # WMO коды погоды Open-Meteo → описание на русском
 _WEATHER_CODE_RU = {
     0: "ясно",
@@ -673,55 +1002,84 @@ _WEATHER_CODE_RU = {
     96: "гроза с небольшим градом",
     99: "гроза с градом",
 }
+_WEATHER_DESC_DEFAULT = "без осадков"
+# Коды WMO укладываются в 0..99: индекс в кортеже вместо поиска в словаре
+_WEATHER_DESC_BY_CODE = tuple(
+    _WEATHER_CODE_RU.get(code, _WEATHER_DESC_DEFAULT) for code in range(100)
+)
+del _WEATHER_CODE_RU
 
 
 def _weather_desc(code: int) -> str:
     """Преобразование WMO-кода в текст."""
-    return _WEATHER_CODE_RU.get(int(code), "без осадков")
+    code = int(code)
+    if 0 <= code < 100:
+        return _WEATHER_DESC_BY_CODE[code]
+    return _WEATHER_DESC_DEFAULT
 
 
-def get_weather() -> str:
-    """Получение погоды через Open-Meteo API (бесплатно, без API-ключа)."""
-    from config import WEATHER_CITY, WEATHER_LAT, WEATHER_LON, WEATHER_TIMEZONE
+# Последний успешный ответ о погоде и его Last-Modified — для условного запроса
+_weather_last = {"text": "", "last_modified": None}
 
-    try:
-        url = "https://api.open-meteo.com/v1/forecast"
-        response = requests.get(
-            url,
-            params={
-                "latitude": WEATHER_LAT,
-                "longitude": WEATHER_LON,
-                "current": "temperature_2m,weather_code",
-                "daily": "weather_code,temperature_2m_max,temperature_2m_min",
-                "timezone": WEATHER_TIMEZONE,
-                "forecast_days": 1,
-            },
-            timeout=REQUEST_TIMEOUT,
-        )
-        data = response.json()
 
-        if "error" in data:
-            logger.warning("Open-Meteo error: %s", data.get("reason", data))
-            return "🌡️ Не удалось получить данные о погоде"
+@_ttl_cache(WEATHER_CACHE_TTL)
+def _fetch_weather() -> str:
+    """
+    Запрос погоды к Open-Meteo через общую сессию (кэш WEATHER_CACHE_TTL).
+    Если API отдал Last-Modified, повторный запрос условный: при 304 тело
+    не передаётся и не разбирается, используется прошлый текст.
+    Ответ API с ошибкой — пустая строка: она не кэшируется.
+    """
+    headers = {}
+    if _weather_last["text"] and _weather_last["last_modified"]:
+        headers["If-Modified-Since"] = _weather_last["last_modified"]
+    response = _session.get(
+        _WEATHER_API_URL,
+        headers=headers,
+        params={
+            "latitude": WEATHER_LAT,
+            "longitude": WEATHER_LON,
+            "current": "temperature_2m,weather_code",
+            "daily": "weather_code,temperature_2m_max,temperature_2m_min",
+            "timezone": WEATHER_TIMEZONE,
+            "forecast_days": 1,
+        },
+        timeout=REQUEST_TIMEOUT,
+    )
+    if response.status_code == 304:
+        return _weather_last["text"]
+    data = response.json()
 
-        curr = data.get("current", {})
-        daily = data.get("daily", {})
+    if "error" in data:
+        logger.warning("Open-Meteo error: %s", data.get("reason", data))
+        return ""
 
-        temp = curr.get("temperature_2m")
-        code = curr.get("weather_code", 0)
-        desc = _weather_desc(code)
+    curr = data.get("current", {})
+    daily = data.get("daily", {})
 
-        parts = [f"🌡️ {WEATHER_CITY}: {temp:+.0f}°C, {desc}"]
+    temp = curr.get("temperature_2m")
+    code = curr.get("weather_code", 0)
+    desc = _weather_desc(code)
 
-        times = daily.get("time", [])
-        if times:
-            t_max = daily.get("temperature_2m_max", [None])[0]
-            t_min = daily.get("temperature_2m_min", [None])[0]
-            if t_max is not None and t_min is not None:
-                parts.append(f"Днём: {t_max:+.0f}°C, ночью: {t_min:+.0f}°C")
+    parts = [f"🌡️ {WEATHER_CITY}: {temp:+.0f}°C, {desc}"]
 
-        return "\n".join(parts)
+    times = daily.get("time", [])
+    if times:
+        t_max = daily.get("temperature_2m_max", [None])[0]
+        t_min = daily.get("temperature_2m_min", [None])[0]
+        if t_max is not None and t_min is not None:
+            parts.append(f"Днём: {t_max:+.0f}°C, ночью: {t_min:+.0f}°C")
 
+    text = "\n".join(parts)
+    _weather_last["text"] = text
+    _weather_last["last_modified"] = response.headers.get("Last-Modified")
+    return text
+
+
+def get_weather() -> str:
+    """Получение погоды через Open-Meteo API (бесплатно, без API-ключа)."""
+    try:
+        return _fetch_weather() or "🌡️ Не удалось получить данные о погоде"
     except Exception as e:
         logger.error("Ошибка получения погоды: %s", e)
         return "🌡️ Ошибка при получении погоды"
@@ -31,17 +31,22 @@ def main():
         print("❗ TELEGRAM_BOT_TOKEN не найден в .env")
         sys.exit(1)
 
-    resp = requests.post(
-        f"https://api.telegram.org/bot{BOT_TOKEN}/setWebhook",
-        json={"url": webhook_url},
-    )
-    data = resp.json()
-
-    if data.get("ok"):
-        print(f"✅ Webhook установлен: {webhook_url}")
-    else:
-        print(f"❌ Ошибка: {data.get('description', data)}")
-        sys.exit(1)
+    api_url = f"https://api.telegram.org/bot{BOT_TOKEN}"
+    # Одна сессия: установка и проверка идут по одному TLS-соединению
+    with requests.Session() as session:
+        data = session.post(
+            f"{api_url}/setWebhook", json={"url": webhook_url}, timeout=30
+        ).json()
+        if not data.get("ok"):
+            print(f"❌ Ошибка: {data.get('description', data)}")
+            sys.exit(1)
+
+        info = session.get(f"{api_url}/getWebhookInfo", timeout=30).json()
+
+    result = info.get("result", {})
+    print(f"✅ Webhook установлен: {result.get('url') or webhook_url}")
+    if result.get("last_error_message"):
+        print(f"⚠️ Последняя ошибка доставки: {result['last_error_message']}")
 
 
 if __name__ == "__main__":
@@ -2,17 +2,39 @@
 # -*- coding: utf-8 -*-
 """Утилиты форматирования сообщений"""
 
-import html
+from functools import lru_cache
 from typing import List, Dict
 
 from config import MAX_MESSAGE_LENGTH
 
+# Таблицы для str.translate: один проход по строке вместо цепочки replace
+_HTML_ESCAPE_TABLE = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;",
+})
 
+# Шаблоны блока статьи: собираются одним format вместо цепочки +=
+_HTML_BLOCK = '{i}. <b>{title}</b>\n{summary_line}🔗 <a href="{url}">Читать</a>\n\n'
+_MARKDOWN_BLOCK = "{i}. **{title}**\n{summary_line}🔗 [Читать]({url})\n\n"
+
+
+@lru_cache(maxsize=1024)
 def escape_html(text: str) -> str:
-    """Экранирование для HTML-режима Telegram."""
+    """Экранирование для HTML-режима Telegram (как html.escape)."""
     if not text:
         return ""
-    return html.escape(str(text))
+    return str(text).translate(_HTML_ESCAPE_TABLE)
+
+
+def escape_url_attr(url: str) -> str:
+    """
+    Экранирование URL для атрибута href.
+    Полное HTML-экранирование: & и < в URL не ломают разметку Telegram.
+    """
+    return escape_html(url)
 
 
 def format_articles_list(
@@ -22,29 +44,27 @@ def format_articles_list(
     use_html: bool = True,
 ) -> str:
     """Форматирование списка статей в одно сообщение."""
+    template = _HTML_BLOCK.format if use_html else _MARKDOWN_BLOCK.format
     lines = [header, ""]
+    # Длина "\n".join(lines) считается по ходу, без склейки списка на каждой статье
+    text_len = len(header) + 1
+    limit = max_length - 50
     for i, a in enumerate(articles, 1):
         title = escape_html(a["title"])
-        summary = escape_html(a.get("summary", "")) if a.get("summary") else ""
+        summary = escape_html(a.get("summary"))
         url = a["url"]
+        block = template(
+            i=i,
+            title=title if use_html else a["title"],
+            summary_line=f"{summary}\n" if summary else "",
+            url=escape_url_attr(url) if use_html else url,
+        )
 
-        if use_html:
-            # В href экранируем только кавычки для безопасности
-            url_safe = url.replace('"', "&quot;") if '"' in url else url
-            block = f'{i}. <b>{title}</b>\n'
-            if summary:
-                block += f"{summary}\n"
-            block += f'🔗 <a href="{url_safe}">Читать</a>\n\n'
-        else:
-            block = f"{i}. **{a['title']}**\n"
-            if summary:
-                block += f"{summary}\n"
-            block += f"🔗 [Читать]({url})\n\n"
-
-        if len("\n".join(lines) + block) > max_length - 50:
+        if text_len + len(block) > limit:
             lines.append("… (сообщение обрезано)")
             break
         lines.append(block)
+        text_len += len(block) + 1
 
     return "\n".join(lines).strip()
 